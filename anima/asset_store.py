@@ -0,0 +1,156 @@
+import argparse
+import hashlib
+import json
+import re
+import shutil
+import sys
+from pathlib import Path
+
+SITE_DIR = Path(__file__).resolve().parent.parent
+STATIC_DIR = SITE_DIR / 'static'
+CONTENT_DIR = SITE_DIR / 'content'
+# content addressed files, published as /media/<hash>.<ext>. github pages has no way to
+# set Cache-Control per path (a _headers file is ignored and published as is), so what
+# this buys there is that a changed file gets a new url and never hits a stale cache
+STORE_DIR = STATIC_DIR / 'media'
+# site path the posts use -> stored file, read by layouts/partials/media-resolve.html
+MANIFEST = SITE_DIR / 'data' / 'media.json'
+MEDIA_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.webp', '.avif', '.webm', '.mp4', '.svg'}
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def site_path(path):
+    return '/' + path.relative_to(STATIC_DIR).as_posix()
+
+
+def load_manifest():
+    if not MANIFEST.exists():
+        return {}
+    return json.loads(MANIFEST.read_text())
+
+
+def save_manifest(manifest):
+    MANIFEST.parent.mkdir(parents=True, exist_ok=True)
+    MANIFEST.write_text(json.dumps(dict(sorted(manifest.items())), indent=2) + '\n')
+
+
+def store(src, logical, manifest):
+    # identical content ends up in the same file whatever path it is published under
+    target = STORE_DIR / f'{file_hash(src)[:20]}{src.suffix.lower()}'
+    is_new = not target.exists()
+    if is_new:
+        STORE_DIR.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(src, target)
+    manifest[logical] = site_path(target)
+    return target, is_new
+
+
+def front_matter_images():
+    # cover images are read by the theme straight from front matter, not through the
+    # manifest, so those files have to stay where they are
+    images = set()
+    for post in CONTENT_DIR.rglob('*.md'):
+        parts = post.read_text().split('---', 2)
+        if len(parts) == 3:
+            for path in re.findall(r'^\s*image:\s*["\']?([^"\'\s]+)', parts[1], re.M):
+                images.add('/' + path.lstrip('/'))
+    return images
+
+
+def media_files(paths):
+    for path in paths:
+        candidates = path.rglob('*') if path.is_dir() else [path]
+        for f in sorted(candidates):
+            if f.is_file() and f.suffix.lower() in MEDIA_EXTENSIONS and STORE_DIR not in f.parents:
+                yield f
+
+
+def ingest(paths, manifest, move=False):
+    # copy (or move) media under static/ into the store
+    outside = [p for p in paths if p != STATIC_DIR and STATIC_DIR not in p.parents]
+    if outside:
+        raise ValueError(f'not under {STATIC_DIR}: {", ".join(map(str, outside))}')
+    pinned = front_matter_images() if move else set()
+    files = stored = saved = 0
+    for f in media_files(paths):
+        _, is_new = store(f, site_path(f), manifest)
+        files += 1
+        if is_new:
+            stored += 1
+        else:
+            saved += f.stat().st_size
+        # front matter may leave out the extension
+        if move and not {site_path(f), site_path(f.with_suffix(''))} & pinned:
+            f.unlink()
+    return files, stored, saved
+
+
+def gc(manifest):
+    referenced = {STATIC_DIR / path.lstrip('/') for path in manifest.values()}
+    removed = [f for f in STORE_DIR.glob('*') if f.is_file() and f not in referenced]
+    for f in removed:
+        f.unlink()
+    return removed
+
+
+def check(manifest):
+    problems = []
+    for logical, stored in manifest.items():
+        f = STATIC_DIR / stored.lstrip('/')
+        if not f.exists():
+            problems.append(f'{logical}: {stored} is missing')
+        elif not file_hash(f).startswith(f.stem):
+            problems.append(f'{logical}: {stored} does not match its hash')
+    return problems
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='content addressed media store for static/')
+    commands = parser.add_subparsers(dest='command', required=True)
+    ingest_cmd = commands.add_parser('ingest', help='copy media under static/ into the store')
+    ingest_cmd.add_argument('paths', nargs='*', type=Path, help='files or directories (default: static/)')
+    ingest_cmd.add_argument('--move', action='store_true',
+                            help='delete the originals (front matter cover images are kept)')
+    add_cmd = commands.add_parser('add', help='store a file (e.g. an export) under a site path')
+    add_cmd.add_argument('file', type=Path)
+    add_cmd.add_argument('site_path', help='path the posts use, e.g. /interrupts/1.gif')
+    commands.add_parser('gc', help='delete stored files no site path refers to')
+    commands.add_parser('check', help='verify every manifest entry')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    manifest = load_manifest()
+    if args.command == 'ingest':
+        paths = [p.resolve() for p in args.paths] or [STATIC_DIR]
+        try:
+            files, stored, saved = ingest(paths, manifest, args.move)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 2
+        save_manifest(manifest)
+        print(f'{files} files, {stored} new in the store, {saved / 1024:.0f} KiB of duplicates')
+    elif args.command == 'add':
+        target, _ = store(args.file, '/' + args.site_path.lstrip('/'), manifest)
+        save_manifest(manifest)
+        print(f'{args.site_path} -> {site_path(target)}')
+    elif args.command == 'gc':
+        removed = gc(manifest)
+        print(f'removed {len(removed)} unreferenced files')
+    elif args.command == 'check':
+        problems = check(manifest)
+        print('\n'.join(problems) or f'{len(manifest)} entries ok')
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,232 @@
+import argparse
+import ast
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from importlib import metadata
+from pathlib import Path
+
+import asset_store
+import export
+import render_all
+from render_all import ANIMA_DIR, SceneJob, find_scenes
+
+# post media site path -> scene and render settings
+MANIFEST = ANIMA_DIR / 'publish.json'
+# site path -> input hash of the last published render. kept out of .cache, which
+# tex_cache prunes, it describes what data/media.json holds
+STATE = ANIMA_DIR / 'publish_state.json'
+DEFAULTS = {
+    'quality': 'h',
+    'args': [],
+    'width': 960,
+    'fps': 30,
+    'poster_time': 0.0,
+    'formats': ['gif', 'webm', 'mp4', 'poster.webp'],
+}
+LIBRARIES = ['ca_3b1b', 'manim', 'manimgl']
+
+
+def load_json(path):
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def library_versions():
+    versions = {}
+    for name in LIBRARIES:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+
+def local_imports(module):
+    # modules next to the importing one or directly under anima/ (scenes put it on sys.path)
+    tree = ast.parse(module.read_text())
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module.split('.')[0])
+    found = []
+    for name in sorted(names):
+        for directory in (module.parent, ANIMA_DIR):
+            candidate = directory / f'{name}.py'
+            if candidate.exists():
+                found.append(candidate)
+                break
+    return found
+
+
+def helper_modules(module):
+    seen, todo = [], local_imports(module)
+    while todo:
+        helper = todo.pop()
+        if helper in seen or helper == module:
+            continue
+        seen.append(helper)
+        todo.extend(local_imports(helper))
+    return sorted(seen)
+
+
+def scene_classes(tree, module, scene):
+    # the scene and the scenes it derives from within its module
+    classes = {node.name: node for node in tree.body if isinstance(node, ast.ClassDef)}
+    others = set(find_scenes(module)[0])
+    chain = []
+    name = scene
+    while name in classes and name not in chain:
+        chain.append(name)
+        bases = [b.id for b in classes[name].bases if isinstance(b, ast.Name) and b.id in others]
+        name = bases[0] if bases else None
+    return [classes[name] for name in chain]
+
+
+def scene_source(module, scene):
+    # the scene (and the scenes it derives from) plus everything at module level that is
+    # not a scene, so editing one scene doesn't invalidate the other scenes of its module
+    text = module.read_text()
+    tree = ast.parse(text)
+    keep = {node.name for node in scene_classes(tree, module, scene)} | {scene}
+    others = set(find_scenes(module)[0]) - keep
+    return '\n'.join(
+        ast.get_source_segment(text, node) for node in tree.body
+        if not (isinstance(node, ast.ClassDef) and node.name in others)
+    )
+
+
+def movie_problem(entry):
+    # why the scene of an entry can't end up as a movie export.find_movie picks up, if so
+    module, scene = entry['scene'].rsplit(':', 1)
+    module = ANIMA_DIR / module
+    if not module.exists():
+        return f'{module} does not exist'
+    scenes, manimgl = find_scenes(module)
+    if scene not in scenes:
+        return f'no scene {scene} in {module.name}'
+    if manimgl:
+        return 'manimgl scene, only manim community renders are exported'
+    # manim only writes a movie for scenes that play() or wait() at least once
+    for node in ast.walk(ast.Module(scene_classes(ast.parse(module.read_text()), module, scene), [])):
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                and node.func.attr in ('play', 'wait', 'wait_until')
+                and isinstance(node.func.value, ast.Name) and node.func.value.id == 'self'):
+            return None
+    return f'{scene} never calls play() or wait(), manim writes no movie for it'
+
+
+def input_hash(entry, versions):
+    module, scene = entry['scene'].rsplit(':', 1)
+    module = ANIMA_DIR / module
+    digest = hashlib.sha256()
+    digest.update(json.dumps({'entry': entry, 'versions': versions}, sort_keys=True).encode())
+    digest.update(scene_source(module, scene).encode())
+    for helper in helper_modules(module):
+        digest.update(helper.relative_to(ANIMA_DIR).as_posix().encode())
+        digest.update(helper.read_bytes())
+    return digest.hexdigest()
+
+
+def variant_path(site_path, fmt):
+    # /interrupts/1.gif + webm -> /interrupts/1.webm, where the media partial looks for it
+    base, ext = site_path.rsplit('.', 1)
+    return site_path if fmt == ext else f'{base}.{fmt}'
+
+
+def scene_job(entry):
+    module, scene = entry['scene'].rsplit(':', 1)
+    module = ANIMA_DIR / module
+    return SceneJob(module, scene, find_scenes(module)[1], entry['quality'], entry['args'])
+
+
+def publish(changed, entries, workers, timeout):
+    # render every changed scene once, even when several posts use it
+    jobs = {}
+    for site_path in changed:
+        job = scene_job(entries[site_path])
+        jobs.setdefault(tuple(job.command()), job)
+    print(f'rendering {len(jobs)} scenes on {workers} workers')
+    rendered = render_all.run(list(jobs.values()), workers, timeout)
+    render_all.report(rendered)
+
+    published = []
+    store = asset_store.load_manifest()
+    with tempfile.TemporaryDirectory() as tmp:
+        exports = {}
+        for i, site_path in enumerate(changed):
+            entry = entries[site_path]
+            if not rendered[scene_job(entry).label][0]:
+                continue
+            try:
+                movie = export.find_movie(entry['scene'])
+            except FileNotFoundError as e:
+                print(e, file=sys.stderr)
+                continue
+            out_dir = Path(tmp) / str(i)
+            out_dir.mkdir()
+            exports[site_path] = [
+                export.ExportJob(movie, out_dir, fmt, entry['width'], entry['fps'], entry['poster_time'])
+                for fmt in entry['formats']
+            ]
+        encoded = export.run([job for jobs in exports.values() for job in jobs], workers)
+        export.report(encoded)
+        for site_path, jobs in exports.items():
+            if all(encoded[job][0] for job in jobs):
+                for job in jobs:
+                    asset_store.store(job.output, variant_path(site_path, job.fmt), store)
+                published.append(site_path)
+    asset_store.save_manifest(store)
+    asset_store.gc(store)
+    return published
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='re-render and publish the post media whose scenes changed')
+    parser.add_argument('--dry-run', action='store_true', help='only list what would be rebuilt')
+    parser.add_argument('--force', action='store_true', help='rebuild everything')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count())
+    parser.add_argument('--timeout', type=float, default=None, help='seconds before a render is killed')
+    parser.add_argument('only', nargs='*', help='only these site paths or module:scene')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    start = time.time()
+    entries = {path: {**DEFAULTS, **entry} for path, entry in load_json(MANIFEST).items()}
+    if args.only:
+        entries = {path: e for path, e in entries.items() if path in args.only or e['scene'] in args.only}
+    problems = {path: movie_problem(entry) for path, entry in entries.items()}
+    problems = {path: problem for path, problem in problems.items() if problem}
+    for path, problem in problems.items():
+        print(f'{path} <- {entries[path]["scene"]}: {problem}', file=sys.stderr)
+    if problems:
+        return 2
+    state = load_json(STATE)
+    store = asset_store.load_manifest()
+    versions = library_versions()
+    hashes = {path: input_hash(entry, versions) for path, entry in entries.items()}
+    changed = [
+        path for path in entries
+        if args.force or state.get(path) != hashes[path] or path not in store
+    ]
+    print(f'{len(changed)}/{len(entries)} post media out of date')
+    for path in changed:
+        print(f'    {path} <- {entries[path]["scene"]}')
+    if args.dry_run or not changed:
+        return 0
+
+    published = publish(changed, entries, args.jobs, args.timeout)
+    state.update({path: hashes[path] for path in published})
+    STATE.write_text(json.dumps(state, indent=2, sort_keys=True) + '\n')
+    print(f'\npublished {len(published)}/{len(changed)} in {time.time() - start:.1f}s')
+    return 0 if len(published) == len(changed) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
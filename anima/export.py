@@ -0,0 +1,142 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+ANIMA_DIR = Path(__file__).resolve().parent
+QUALITY_DIRS = ['2160p60', '1440p60', '1080p60', '720p30', '480p15']
+
+# output name suffix -> ffmpeg output arguments, the input filter chain is added in front
+FORMATS = {
+    # one palette for the whole clip (stats_mode=diff weights what changes between
+    # frames), only the changed rectangle of every frame is stored
+    'gif': ['-filter_complex',
+            '[0:v]{scale},split[a][b];[a]palettegen=stats_mode=diff[p];'
+            '[b][p]paletteuse=dither=bayer:bayer_scale=5:diff_mode=rectangle',
+            '-loop', '0'],
+    'webp': ['-vf', '{scale}', '-c:v', 'libwebp_anim', '-lossless', '0', '-q:v', '75',
+             '-compression_level', '6', '-loop', '0'],
+    'avif': ['-vf', '{scale}', '-c:v', 'libaom-av1', '-crf', '35', '-b:v', '0',
+             '-cpu-used', '6', '-pix_fmt', 'yuv420p'],
+    'webm': ['-vf', '{scale}', '-c:v', 'libvpx-vp9', '-crf', '36', '-b:v', '0',
+             '-row-mt', '1', '-deadline', 'good', '-cpu-used', '4'],
+    'mp4': ['-vf', '{scale}', '-c:v', 'libx264', '-crf', '23', '-preset', 'slow',
+            '-pix_fmt', 'yuv420p', '-movflags', '+faststart'],
+    # still frame for <video poster>
+    'poster.webp': ['-vf', '{scale}', '-frames:v', '1', '-c:v', 'libwebp', '-q:v', '80'],
+}
+
+
+def find_movie(spec):
+    # a movie path, or module.py:Scene for the newest render of that scene
+    if ':' not in spec:
+        return Path(spec)
+    module, scene = spec.rsplit(':', 1)
+    module = (ANIMA_DIR / module).resolve()
+    videos = module.parent / 'media' / 'videos' / module.stem
+    movies = [videos / quality / f'{scene}.mp4' for quality in QUALITY_DIRS]
+    movies = [m for m in movies if m.exists()]
+    if not movies:
+        raise FileNotFoundError(f'no render of {spec} under {videos}')
+    return max(movies, key=lambda m: m.stat().st_mtime)
+
+
+class ExportJob:
+    def __init__(self, movie, out_dir, fmt, width=960, fps=30, poster_time=0.0):
+        self.movie = movie
+        self.out_dir = out_dir
+        self.fmt = fmt
+        self.width = width
+        self.fps = fps
+        self.poster_time = poster_time
+
+    @property
+    def name(self):
+        # media/videos/<module>/<quality>/<Scene>.mp4, scene names repeat across modules
+        if self.movie.parent.parent.parent.name == 'videos':
+            return f'{self.movie.parent.parent.name}_{self.movie.stem}'
+        return self.movie.stem
+
+    @property
+    def output(self):
+        return self.out_dir / f'{self.name}.{self.fmt}'
+
+    def command(self):
+        scale = f'scale={self.width}:-2:flags=lanczos'
+        if self.fmt != 'poster.webp':
+            scale = f'fps={self.fps},{scale}'
+        seek = ['-ss', str(self.poster_time)] if self.fmt == 'poster.webp' else []
+        args = [arg.format(scale=scale) for arg in FORMATS[self.fmt]]
+        return ['ffmpeg', '-y', '-loglevel', 'error', *seek, '-i', str(self.movie), '-an', *args, str(self.output)]
+
+
+def encode(job):
+    start = time.time()
+    try:
+        result = subprocess.run(job.command(), stdin=subprocess.DEVNULL, capture_output=True, text=True)
+        ok, output = result.returncode == 0, result.stderr
+    except OSError as e:
+        ok, output = False, str(e)
+    return ok, time.time() - start, output
+
+
+def run(jobs, workers):
+    # ffmpeg is mostly single threaded for these codecs, one process per output scales better
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(encode, job): job for job in jobs}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+    return results
+
+
+def report(results):
+    by_movie = {}
+    for job, result in results.items():
+        by_movie.setdefault(job.movie, []).append((job, result))
+    failed = False
+    for movie, entries in sorted(by_movie.items()):
+        source = movie.stat().st_size
+        print(f'\n{movie} ({source / 1024:.0f} KiB)')
+        print(f'    {"format":<12} {"size":>10} {"vs source":>10} {"encode":>8}')
+        for job, (ok, seconds, output) in sorted(entries, key=lambda e: e[0].fmt):
+            if not ok:
+                failed = True
+                reason = (output.strip().splitlines() or ['unknown error'])[-1]
+                print(f'    {job.fmt:<12} {"FAILED":>10}   {reason}')
+                continue
+            size = job.output.stat().st_size
+            print(f'    {job.fmt:<12} {size / 1024:>6.0f} KiB {size / source:>9.0%} {seconds:>7.1f}s')
+    return not failed
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='encode rendered scenes into web formats')
+    parser.add_argument('movies', nargs='+', help='movie files or module.py:Scene')
+    parser.add_argument('-o', '--out-dir', type=Path, default=Path('export'))
+    parser.add_argument('-f', '--format', action='append', choices=list(FORMATS),
+                        help='output formats (default: all)')
+    parser.add_argument('-w', '--width', type=int, default=960)
+    parser.add_argument('--fps', type=int, default=30)
+    parser.add_argument('--poster-time', type=float, default=0.0, help='seconds into the movie')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count())
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    args.out_dir.mkdir(parents=True, exist_ok=True)
+    jobs = [
+        ExportJob(find_movie(spec), args.out_dir, fmt, args.width, args.fps, args.poster_time)
+        for spec in args.movies
+        for fmt in args.format or FORMATS
+    ]
+    print(f'encoding {len(jobs)} outputs on {args.jobs} workers')
+    return 0 if report(run(jobs, args.jobs)) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,109 @@
 from manim import *
 import numpy as np
 import IPython
+from collections import OrderedDict
 from manim.opengl import *
+from polylines import curve_size, polyline_points
+from projection import project_to_near_plane
+import tex_cache
+
+tex_cache.use_shared_cache()
+tex_cache.precompile(__file__)
+
+
+def batched_c2p(axes, coords, dim):
+    # axes are linear, so c2p is origin + coords @ basis, rows of basis are the images of the unit coords
+    coords = np.asarray(coords, dtype=float)
+    coords = coords.reshape(-1, coords.shape[-1])[:, :dim]
+    origin = axes.c2p(*np.zeros(dim))
+    basis = np.array([axes.c2p(*unit) for unit in np.eye(dim)]) - origin
+    return origin + coords @ basis[:coords.shape[1]]
+
+
+class PrototypeCache:
+    # builds one instance per (class, kwargs) and hands out copies of it,
+    # least recently used prototypes are dropped once max_size is reached
+    def __init__(self, max_size=16):
+        self.max_size = max_size
+        self.prototypes = OrderedDict()
+
+    def get(self, cls, **kwargs):
+        key = (cls, repr(sorted(kwargs.items())))
+        if key in self.prototypes:
+            self.prototypes.move_to_end(key)
+        else:
+            self.prototypes[key] = cls(**kwargs)
+            if len(self.prototypes) > self.max_size:
+                self.prototypes.popitem(last=False)
+        return self.prototypes[key].copy()
+
+    def clear(self):
+        self.prototypes.clear()
+
+
+axes_cache = PrototypeCache()
+
+
+class ArrowArray(VGroup):
+    # many arrows, one shaft mobject and one tip mobject per color instead of a Line + tip per arrow
+    def __init__(self, starts, ends, colors=YELLOW, labels=None, tip_length=0.15,
+                 max_labels=16, min_label_length=0.3, **kwargs):
+        super().__init__(**kwargs)
+        self.starts = np.asarray(starts, dtype=float).reshape(-1, 3)
+        self.ends = np.asarray(ends, dtype=float).reshape(-1, 3)
+        self.tip_length = tip_length
+        if not isinstance(colors, (list, tuple, np.ndarray)):
+            colors = [colors] * len(self.ends)
+        self.colors = list(colors)
+        self.shafts = VGroup()
+        self.tips = VGroup()
+        self.labels = VGroup()
+        self.gen_shape()
+        if labels is not None:
+            self.gen_labels(labels, max_labels, min_label_length)
+        self.add(self.shafts, self.tips, self.labels)
+
+    def tip_vertices(self):
+        direction = self.ends - self.starts
+        length = np.linalg.norm(direction, axis=1, keepdims=True)
+        direction = direction / np.where(length == 0, 1, length)
+        # tips lie in the plane spanned by the arrow and OUT (or RIGHT when the arrow points OUT)
+        perp = np.cross(direction, OUT)
+        flat = np.linalg.norm(perp, axis=1) < 1e-6
+        perp[flat] = np.cross(direction[flat], RIGHT)
+        # zero length arrows have no direction, any perp will do, their tip has zero size
+        perp[length[:, 0] == 0] = UP
+        perp /= np.linalg.norm(perp, axis=1, keepdims=True)
+
+        tip_len = np.minimum(self.tip_length, length)
+        base = self.ends - direction * tip_len
+        half_width = perp * tip_len / 2
+        return base, np.stack([base + half_width, self.ends, base - half_width, base + half_width], axis=1)
+
+    def gen_shape(self):
+        base, triangles = self.tip_vertices()
+        shafts = np.stack([self.starts, base], axis=1)
+        groups = {}
+        for i, color in enumerate(self.colors):
+            groups.setdefault(str(color), (color, []))[1].append(i)
+        for color, indices in groups.values():
+            shaft = VMobject(color=color, stroke_opacity=.8)
+            shaft.set_points(polyline_points(shafts[indices], curve_size(shaft)))
+            tip = VMobject(color=color, stroke_width=0, fill_opacity=.8)
+            tip.set_points(polyline_points(triangles[indices], curve_size(tip)))
+            self.shafts.add(shaft)
+            self.tips.add(tip)
+
+    def gen_labels(self, labels, max_labels, min_label_length):
+        # only the longest arrows get a label, short ones would just be clutter
+        lengths = np.linalg.norm(self.ends - self.starts, axis=1)
+        order = np.argsort(-lengths)
+        order = order[lengths[order] >= min_label_length][:max_labels]
+        for i in order:
+            center = (self.starts[i] + self.ends[i]) / 2
+            self.labels.add(
+                MathTex(labels[i], color=self.colors[i]).move_to(center + DOWN/8).scale(0.7)
+            )
 
 
 class CustomAxes(Mobject):
@@ -21,13 +123,15 @@ class CustomAxes(Mobject):
         self.create_axes()
         self.create_unit_vectors()
 
+    @classmethod
+    def from_cache(cls, **kwargs):
+        return axes_cache.get(cls, **kwargs)
+
 
     def init_vars(self):
-        self.x_unit_length = np.linalg.norm(
-                self.axes.c2p(1, 0) - self.axes.c2p(0, 0)
-                )
-        self.y_unit_length = np.linalg.norm(
-                self.axes.c2p(0, 1) - self.axes.c2p(0, 0)
+        origin, *units = self.c2p_array([[0, 0], [1, 0], [0, 1]])
+        self.x_unit_length, self.y_unit_length = np.linalg.norm(
+                np.array(units) - origin, axis=1
                 )
 
     @property
@@ -65,9 +169,10 @@ class CustomAxes(Mobject):
 
 
     def add_vector(self, pos, name="v", color=YELLOW):
+        start, end = self.c2p_array([np.zeros(len(pos)), pos])
         l = Line(
-            start=self.axes.c2p(0, 0),
-            end=self.axes.c2p(*pos),
+            start=start,
+            end=end,
             color=color, tip_length=0.15
         ).add_tip()
 
@@ -76,9 +181,20 @@ class CustomAxes(Mobject):
         self.vectors.append(VGroup(l, l_tex))
         self.add(self.vectors[-1])
 
+    def add_vectors(self, coords, colors=YELLOW, labels=None, **kwargs):
+        ends = self.c2p_array(coords)
+        starts = np.repeat(self.c2p_array([[0, 0]]), len(ends), axis=0)
+        arrows = ArrowArray(starts, ends, colors=colors, labels=labels, **kwargs)
+        self.vectors.append(arrows)
+        self.add(arrows)
+        return arrows
+
     def c2p(self, pos):
         return self.axes.c2p(*pos)
 
+    def c2p_array(self, coords):
+        return batched_c2p(self.axes, coords, 2)
+
     def create_unit_vectors(self):
         # i_vec = Vector(self.axes.c2p(1, 0), color=RED)
         i_vec = Line(
@@ -101,7 +217,7 @@ class CustomAxes(Mobject):
 
 class OpenGl2D(Scene):
     def construct(self):
-        axes1 = CustomAxes()
+        axes1 = CustomAxes.from_cache()
         d = Dot().move_to(axes1.c2p([2, 1]))
         axes1.add_vector([2, 1])
         self.add(axes1, d)
@@ -110,6 +226,10 @@ class OpenGl2D(Scene):
 
 
 
+def flush_pending(axes):
+    axes.flush_rotation()
+
+
 class CustomAxes3D(VMobject):
     def __init__(self, x_range=(-5, 5), y_range=(-5, 5), z_range=(-5, 5), color=BLUE, x_length=5, y_length=5, z_length=5, **kwargs):
         super().__init__(**kwargs)
@@ -131,26 +251,25 @@ class CustomAxes3D(VMobject):
         self.y_unit_length = 1
         self.z_unit_length = 1
 
-        self.xy_plane = None
-        self.xz_plane = None
-        self.yz_plane = None
+        # planes are built on first use, see get_single_plane
+        self.planes = {}
 
 
         self.current_orientation = np.array([])
+        self.pending_orientation = np.identity(3)
 
         self.create_axes()
         self.create_unit_vectors()
 
+    @classmethod
+    def from_cache(cls, **kwargs):
+        return axes_cache.get(cls, **kwargs)
+
 
     def init_vars(self):
-        self.x_unit_length = np.linalg.norm(
-                self.axes.c2p(1, 0, 0) - self.axes.c2p(0, 0, 0)
-                )
-        self.y_unit_length = np.linalg.norm(
-                self.axes.c2p(0, 1, 0) - self.axes.c2p(0, 0, 0)
-                )
-        self.z_unit_length = np.linalg.norm(
-                self.axes.c2p(0, 0, 1) - self.axes.c2p(0, 0, 0)
+        origin, *units = self.c2p_array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1]])
+        self.x_unit_length, self.y_unit_length, self.z_unit_length = np.linalg.norm(
+                np.array(units) - origin, axis=1
                 )
         self.current_orientation = np.array([
             [1, 0, 0],
@@ -179,59 +298,80 @@ class CustomAxes3D(VMobject):
             z_length=self.z_length
         )
         self.init_vars()
+        self.add(self.axes)
 
-        self.xy_plane = NumberPlane(
-            x_range=self.x_range, y_range=self.y_range,
-            x_length=self.x_length,
-            y_length=self.y_length,
-            background_line_style={
-                "stroke_color": TEAL,
-                "stroke_width": 4,
-                "stroke_opacity": 0.4
-            }
-        )
-
-        self.xz_plane = NumberPlane(
-            x_range=self.x_range, y_range=self.z_range,
-            x_length=self.x_length,
-            y_length=self.z_length,
-            background_line_style={
-                "stroke_color": ORANGE,
-                "stroke_width": 4,
-                "stroke_opacity": 0.4
-            }
-        )
-        self.xz_plane.apply_matrix(np.array([
-            [1, 0, 0],
-            [0, np.cos(PI/2), np.sin(PI/2)],
-            [0, -np.sin(PI/2), np.cos(PI/2)]
-            ]))
-
-        self.zy_plane = NumberPlane(
-            x_range=self.z_range, y_range=self.y_range,
-            x_length=self.z_length,
-            y_length=self.y_length,
-            background_line_style={
-                "stroke_color": PINK,
-                "stroke_width": 4,
-                "stroke_opacity": 0.4
-            }
-        )
-        self.zy_plane.apply_matrix(np.array([
-            [np.cos(PI/2), 0, -np.sin(PI/2)],
-            [0, 1, 0],
-            [np.sin(PI/2), 0, np.cos(PI/2)]
-            ]))
-
+    def create_plane(self, name, step=1):
+        # step: distance between grid lines in axis units, bigger step -> fewer lines
+        if name == "xy":
+            plane = NumberPlane(
+                x_range=(*self.x_range[:2], step), y_range=(*self.y_range[:2], step),
+                x_length=self.x_length,
+                y_length=self.y_length,
+                background_line_style={
+                    "stroke_color": TEAL,
+                    "stroke_width": 4,
+                    "stroke_opacity": 0.4
+                }
+            )
+        elif name == "xz":
+            plane = NumberPlane(
+                x_range=(*self.x_range[:2], step), y_range=(*self.z_range[:2], step),
+                x_length=self.x_length,
+                y_length=self.z_length,
+                background_line_style={
+                    "stroke_color": ORANGE,
+                    "stroke_width": 4,
+                    "stroke_opacity": 0.4
+                }
+            )
+            plane.apply_matrix(np.array([
+                [1, 0, 0],
+                [0, np.cos(PI/2), np.sin(PI/2)],
+                [0, -np.sin(PI/2), np.cos(PI/2)]
+                ]))
+        elif name == "zy":
+            plane = NumberPlane(
+                x_range=(*self.z_range[:2], step), y_range=(*self.y_range[:2], step),
+                x_length=self.z_length,
+                y_length=self.y_length,
+                background_line_style={
+                    "stroke_color": PINK,
+                    "stroke_width": 4,
+                    "stroke_opacity": 0.4
+                }
+            )
+            plane.apply_matrix(np.array([
+                [np.cos(PI/2), 0, -np.sin(PI/2)],
+                [0, 1, 0],
+                [np.sin(PI/2), 0, np.cos(PI/2)]
+                ]))
+        else:
+            raise ValueError(f"unknown plane {name}, expected one of xy, xz, zy")
+        return plane
+
+    def get_single_plane(self, name, step=1):
+        key = (name, step)
+        if key not in self.planes:
+            self.planes[key] = self.create_plane(name, step)
+        return self.planes[key]
 
-        self.add(self.axes)
+    @property
+    def xy_plane(self):
+        return self.get_single_plane("xy")
+    @property
+    def xz_plane(self):
+        return self.get_single_plane("xz")
+    @property
+    def zy_plane(self):
+        return self.get_single_plane("zy")
 
     def add_vector(self, pos, name="v", color=YELLOW, normlized=False):
         if normlized == True:
             pos = pos/np.linalg.norm(pos)
+        start, end = self.c2p_array([[0, 0, 0], pos])
         l = Line(
-            start=self.axes.c2p(0, 0, 0),
-            end=self.axes.c2p(*pos),
+            start=start,
+            end=end,
             color=color, tip_length=0.15
         ).add_tip()
 
@@ -240,51 +380,89 @@ class CustomAxes3D(VMobject):
         self.vectors.append(VGroup(l, l_tex))
         self.add(self.vectors[-1])
 
+    def add_vectors(self, coords, colors=YELLOW, labels=None, normlized=False, **kwargs):
+        coords = np.asarray(coords, dtype=float)
+        if normlized == True:
+            coords = coords/np.linalg.norm(coords, axis=1, keepdims=True)
+        ends = self.c2p_array(coords)
+        starts = np.repeat(self.c2p_array([[0, 0, 0]]), len(ends), axis=0)
+        arrows = ArrowArray(starts, ends, colors=colors, labels=labels, **kwargs)
+        self.vectors.append(arrows)
+        self.add(arrows)
+        return arrows
+
 
 
     def c2p(self, pos):
+        self.flush_rotation()
         return self.axes.c2p(*pos)
 
-    def reset_rot(self):
-        rot_mat = np.array([
-            [1, 0, 0],
-            [0, 1, 0],
-            [0, 0, 1]
-            ])
-
+    def c2p_array(self, coords):
+        self.flush_rotation()
+        return batched_c2p(self.axes, coords, 3)
+
+    # rotations compose into pending_orientation and the points are touched once by
+    # flush_rotation. by default that happens right away, so .animate / generate_target
+    # copies see the rotated points. lazy=True leaves the flush to an updater (once per
+    # frame), for updaters that rotate several times per frame. the updater is only
+    # attached while a rotation is pending, a mobject with updaters is redrawn every frame
+    def flush_rotation(self):
+        if flush_pending in self.updaters:
+            # this runs from inside update(), which is iterating over the current list
+            self.updaters = list(self.updaters)
+            self.remove_updater(flush_pending)
+        if np.allclose(self.pending_orientation, np.identity(3)):
+            return self
+        rot_mat = self.pending_orientation
+        self.pending_orientation = np.identity(3)
         self.apply_matrix(rot_mat)
+        return self
+
+    def generate_target(self, use_deepcopy=False):
+        # a lazy rotation still pending would otherwise be missing from the target
+        self.flush_rotation()
+        return super().generate_target(use_deepcopy)
+
+    def rotate_by(self, rot_mat, lazy=False):
+        self.current_orientation = np.matmul(rot_mat, self.current_orientation)
+        self.pending_orientation = np.matmul(rot_mat, self.pending_orientation)
+        if not lazy:
+            self.flush_rotation()
+        elif flush_pending not in self.updaters:
+            self.add_updater(flush_pending)
+        return self
+
+    def reset_rot(self, lazy=False):
+        # rotations are orthonormal, the transpose undoes everything applied so far
+        return self.rotate_by(self.current_orientation.T, lazy)
 
 
-    def rot_about_y(self, angle):
+    def rot_about_y(self, angle, lazy=False):
         rot_mat = np.array([
             [np.cos(angle), 0, -np.sin(angle)],
             [0, 1, 0],
             [np.sin(angle), 0, np.cos(angle)]
             ])
 
+        return self.rotate_by(rot_mat, lazy)
 
-        self.current_orientation = np.matmul(rot_mat, self.current_orientation)
-        self.apply_matrix(rot_mat)
-
-    def rot_about_x(self, angle):
+    def rot_about_x(self, angle, lazy=False):
         rot_mat = np.array([
             [1, 0, 0],
             [0, np.cos(angle), np.sin(angle)],
             [0, -np.sin(angle), np.cos(angle)]
             ])
 
-        self.current_orientation = np.matmul(rot_mat, self.current_orientation)
-        self.apply_matrix(rot_mat)
+        return self.rotate_by(rot_mat, lazy)
 
-    def rot_about_z(self, angle):
+    def rot_about_z(self, angle, lazy=False):
         rot_mat = np.array([
-            [np.cos(angle), 0, np.sin(angle)],
-            [0, 1, 0],
-            [-np.sin(angle), 0, np.cos(angle)]
+            [np.cos(angle), np.sin(angle), 0],
+            [-np.sin(angle), np.cos(angle), 0],
+            [0, 0, 1]
             ])
 
-        self.current_orientation = np.matmul(rot_mat, self.current_orientation)
-        self.apply_matrix(rot_mat)
+        return self.rotate_by(rot_mat, lazy)
 
     def create_unit_vectors(self):
         # i_vec = Vector(self.axes.c2p(1, 0), color=RED)
@@ -320,15 +498,15 @@ class CustomAxes3D(VMobject):
         gen_point = dir_vec*length
         return Line (start=p1, end=gen_point, color=color)
 
-    def get_plane(self):
-        return VGroup(self.zy_plane, self.xy_plane, self.xz_plane)
+    def get_plane(self, step=1):
+        return VGroup(*[self.get_single_plane(name, step) for name in ("zy", "xy", "xz")])
 
 
 
 class OpenGl3D(ThreeDScene):
     def construct(self):
         self.set_camera_orientation(zoom=.75)
-        background_axes = CustomAxes3D(
+        background_axes = CustomAxes3D.from_cache(
                             color=PINK
                             )
         
@@ -349,7 +527,7 @@ class OpenGl3D(ThreeDScene):
     
         # CAMERA
         camera = VGroup()
-        camera_axes = CustomAxes3D(x_range=(-1,1), y_range=(-1,1), z_range=(-10,1), x_length=1, y_length=1, z_length=8)
+        camera_axes = CustomAxes3D.from_cache(x_range=(-1,1), y_range=(-1,1), z_range=(-10,1), x_length=1, y_length=1, z_length=8)
         cube = Cube(camera_axes.x_unit_len/4, color=BLUE_B)
         camera.add(camera_axes, cube)
         camera.move_to(background_axes.c2p([0, 0, 7]))
@@ -447,11 +625,7 @@ class OpenGl3D(ThreeDScene):
 
 
 def get_projected_point_m1(near, pos):
-    return np.array([
-        -near*pos[0]/pos[2],
-        -near*pos[1]/pos[2],
-        -near
-    ])
+    return project_to_near_plane(near, [pos])[0]
 
 def get_vec_text(pos, next_to_pos):
     return MathTex(r"\vec{v} = \begin{bmatrix}"
@@ -461,10 +635,10 @@ def get_vec_text(pos, next_to_pos):
 
 class AspectRatio(ThreeDScene):
     def construct(self):
-        ref_axes = CustomAxes3D()
+        ref_axes = CustomAxes3D.from_cache()
 
         camera = VGroup()
-        camera_axes = CustomAxes3D(x_range=(-1,1), y_range=(-1,1), z_range=(-10,1), x_length=1, y_length=1, z_length=8)
+        camera_axes = CustomAxes3D.from_cache(x_range=(-1,1), y_range=(-1,1), z_range=(-10,1), x_length=1, y_length=1, z_length=8)
         cube = Cube(camera_axes.x_unit_len/4, color=BLUE_B)
         camera.add(camera_axes, cube)
         camera.move_to(ref_axes.c2p([0, 0, 7]))
@@ -1,5 +1,16 @@
 from manim import *
 from manim.opengl import *
+import numpy as np
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import tex_cache
+from polylines import curve_size, polyline_points
+from segments import SegmentedScene
+from stream import StreamingScene
+
+tex_cache.use_shared_cache()
 
 src_code = """
 void main(void)
@@ -14,7 +25,7 @@ void main(void)
 }
 """
 
-class Test(Scene):
+class Test(SegmentedScene):
     def construct(self):
         line_to_renrender = ValueTracker(0)
         c = Code(
@@ -102,7 +113,7 @@ void loop() {
 '''
 
 
-class Test2(Scene):
+class Test2(SegmentedScene):
     def construct(self):
         c = Code(
             code=arduino_src,
@@ -181,7 +192,7 @@ class Button(OpenGLVMobject):
         self.add(self.container_handle, self.text_handle)
 
 
-class Test3(Scene):
+class Test3(SegmentedScene):
     def construct(self):
         c = Code(
             code=src1,
@@ -214,11 +225,49 @@ class Test3(Scene):
         self.wait()
 
 
+class LineArray(VMobject):
+    # all pins live in one point buffer, one straight curve per pin,
+    # so the whole array is a single mobject and a single draw call
+    def __init__(self, starts, ends, **kwargs):
+        super().__init__(**kwargs)
+        self.n_pins = len(starts)
+        self.gen_shape(np.array(starts, dtype=float), np.array(ends, dtype=float))
+
+    def gen_shape(self, starts, ends):
+        self.set_points(polyline_points(np.stack([starts, ends], axis=1), curve_size(self)))
+
+    def get_pin_start(self, i):
+        return self.points[i * curve_size(self)].copy()
+
+    def get_pin_end(self, i):
+        return self.points[(i + 1) * curve_size(self) - 1].copy()
+
+    def pin_point(self, i, alpha=0.5):
+        # point along pin i, 0 is its start and 1 its end
+        return interpolate(self.get_pin_start(i), self.get_pin_end(i), alpha)
+
+    def get_pin(self, i):
+        # detached copy of one pin (not part of this mobject), to add and highlight on its own
+        return Line(
+            start=self.get_pin_start(i),
+            end=self.get_pin_end(i),
+            color=self.get_stroke_color(),
+            stroke_width=self.get_stroke_width()
+        )
+
+
+def pin_column(n, x_start, x_end, y_center, spacing):
+    ys = y_center + (np.arange(n) - (n - 1) / 2) * spacing
+    starts = np.array([[x_start, y, 0] for y in ys])
+    ends = np.array([[x_end, y, 0] for y in ys])
+    return starts, ends
+
+
 class GPIO(OpenGLVMobject):
     def __init__(self, label='GPIOx', **kwargs):
         super().__init__(**kwargs)
         self.label = label
-        self.io_lines = VGroup()
+        self.io_lines = None
         self.body = None
         self.label_handel = None
         self.gen_shape()
@@ -231,13 +280,10 @@ class GPIO(OpenGLVMobject):
             self.body.get_center()
             ).match_width(self.body).scale(.9)
 
-        for i in range(16):
-            l = Line(
-                start=self.body.get_corner(UL),
-                end=self.body.get_corner(UL) - LEFT
-            )
-            self.io_lines.add(l)
-        self.io_lines.arrange(UP, buff=.1).shift(LEFT * self.body.get_width())
+        left = self.body.get_left()
+        self.io_lines = LineArray(*pin_column(
+            16, left[0] - 1, left[0], left[1], spacing=.1
+        ))
         self.add(self.body, self.label_handel, self.io_lines)
 
 class EXTI(OpenGLVMobject):
@@ -246,8 +292,8 @@ class EXTI(OpenGLVMobject):
         self.label = label
         self.in_lines = in_lines
         self.out_lines = out_lines
-        self.in_lines_handel = VGroup()
-        self.out_lines_handel = VGroup()
+        self.in_lines_handel = None
+        self.out_lines_handel = None
         self.body = None
         self.label_handel = None
         self.gen_shape()
@@ -260,22 +306,23 @@ class EXTI(OpenGLVMobject):
             self.body.get_center()
         ).match_width(self.body).scale(.9)
 
-        for i in range(self.in_lines):
-            l = Line(
-                start=self.body.get_corner(UR),
-                end=self.body.get_corner(UR) + RIGHT, color=BLUE
-            )
-            self.in_lines_handel.add(l)
-        self.in_lines_handel.arrange(UP).match_height(self.body).shift(RIGHT * self.body.get_width())
+        # same layout as stacking unit lines with the default buff and
+        # matching the stack height to the body: pins shrink along with the spacing
+        height = self.body.get_height()
+        width = self.body.get_width()
+        center = self.body.get_center()
 
+        spacing = height / max(self.in_lines - 1, 1)
+        half = spacing / DEFAULT_MOBJECT_TO_MOBJECT_BUFFER / 2
+        self.in_lines_handel = LineArray(*pin_column(
+            self.in_lines, center[0] + width - half, center[0] + width + half, center[1], spacing
+        ), color=BLUE)
 
-        for i in range(self.out_lines):
-            l = Line(
-                start=self.body.get_corner(UL),
-                end=self.body.get_corner(UL) - LEFT, color=RED
-            )
-            self.out_lines_handel.add(l)
-        self.out_lines_handel.arrange(UP).match_height(self.body).shift(LEFT * self.body.get_width())
+        spacing = height / max(self.out_lines - 1, 1)
+        half = spacing / DEFAULT_MOBJECT_TO_MOBJECT_BUFFER / 2
+        self.out_lines_handel = LineArray(*pin_column(
+            self.out_lines, center[0] - width - half, center[0] - width + half, center[1], spacing
+        ), color=RED)
 
         self.add(self.body, self.label_handel, self.in_lines_handel, self.out_lines_handel)
 
@@ -301,16 +348,13 @@ class Mux(OpenGLVMobject):
         self.add(self.body)
 
         # Input Lines (on the right side)
-        self.input_lines = VGroup()
         step = height / (n_inputs + 1)
-        for i in range(n_inputs):
-            y_pos = height / 2 - (i + 1) * step
-            input_line = Line(
-                start=[width / 2, y_pos, 0],
-                end=[width / 2 + 1, y_pos, 0],
-                color=BLUE
-            )
-            self.input_lines.add(input_line)
+        y_pos = height / 2 - (np.arange(n_inputs) + 1) * step
+        self.input_lines = LineArray(
+            [[width / 2, y, 0] for y in y_pos],
+            [[width / 2 + 1, y, 0] for y in y_pos],
+            color=BLUE
+        )
         self.add(self.input_lines)
 
         # Output Line (on the left side)
@@ -322,16 +366,13 @@ class Mux(OpenGLVMobject):
         self.add(self.output_line)
 
         # Vertical Select Lines (connected to body)
-        self.select_lines = VGroup()
         select_spacing = width / (n_select + 1)  # Horizontal spacing for select lines
-        for i in range(n_select):
-            x_pos = -width / 2 + (i + 1) * select_spacing
-            select_line = Line(
-                start=[x_pos, -height / 2, 0],      # Start at the bottom edge of the body
-                end=[x_pos, -height / 2 - 1, 0],    # Extend downward
-                color=RED
-            )
-            self.select_lines.add(select_line)
+        x_pos = -width / 2 + (np.arange(n_select) + 1) * select_spacing
+        self.select_lines = LineArray(
+            [[x, -height / 2, 0] for x in x_pos],      # Start at the bottom edge of the body
+            [[x, -height / 2 - 1, 0] for x in x_pos],  # Extend downward
+            color=RED
+        )
         self.add(self.select_lines)
 
     def get_input_lines(self):
@@ -346,7 +387,7 @@ class Mux(OpenGLVMobject):
 
 
 
-class Test4(Scene):
+class Test4(StreamingScene):
     def construct(self):
         gpioa = GPIO(label='GPIOA')
         gpiob = GPIO(label='GPIOB')
@@ -375,13 +416,13 @@ class Test4(Scene):
 
 
         gpioa_l0_to_mux = Line(
-            start=gpioa.io_lines[15].get_start(),
-            end=mux.get_input_lines()[0].get_end(),
+            start=gpioa.io_lines.get_pin_start(15),
+            end=mux.get_input_lines().get_pin_end(0),
             color=BLUE
         )
         out_mux_to_in_exti0 = Line(
             start=mux.get_output_line().get_end(),
-            end=exti.in_lines_handel[22].get_end(), color=GREEN
+            end=exti.in_lines_handel.get_pin_end(22), color=GREEN
         )
 
         select_lines_text = Text('SYSCFG_EXTICRx').next_to(mux.get_select_lines(), DOWN)
@@ -1,9 +1,19 @@
 from typing import Final
+import hashlib
+import numpy as np
+import sys
+from pathlib import Path
+from weakref import WeakKeyDictionary
 from ca_3b1b import *
 from ca_3b1b.ic import Gear
 from manimlib import *
 
-INTERRUPT_BIT:Final = 1 << 23
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from nvic_sim import EXTI, EXTI_IRQN, NVIC, Simulator, irq_bit, latencies, vector_address
+
+# the button sits on EXTI8, which shares EXTI9_5_IRQn with lines 5..9
+EXTI8_IRQN:Final = int(EXTI_IRQN[8])
+INTERRUPT_BIT:Final = irq_bit(EXTI8_IRQN)
 NORMAL_SOURCE_CODE:Final = '''
 void main(void) {
     init();
@@ -15,6 +25,17 @@ void main(void) {
 }
 '''
 
+# register -> value when the interrupt arrives, in stacking order
+CPU_REGS:Final = [
+    ('xpsr', 0x1000000), ('pc', 0x8000208), ('lr', 0x8000205), ('r12', 0x20),
+    ('r3', 0xe000e100), ('r2', 0x800000), ('r1', 0x10), ('r0', 0x40020000),
+]
+
+# cortex-m exception numbers with no vector
+RESERVED_EXCEPTIONS:Final = {7, 8, 9, 10, 13}
+RESET_HANDLER:Final = 0x08000199
+DEFAULT_HANDLER:Final = 0x080001ed
+
 ISR_SOURCE_CODE:Final = '''
 void exti9_5_isr(void) {
   if (exti_get_flag_status(EXTI8)) {
@@ -25,6 +46,25 @@ void exti9_5_isr(void) {
 }
 '''
 
+class TimeTable:
+    # samples a periodic function of time once per frame over one period,
+    # updaters then just look the value up instead of recomputing/accumulating it
+    def __init__(self, func, period, fps=60):
+        self.period = period
+        self.fps = fps
+        times = np.arange(max(int(round(period * fps)), 1)) / fps
+        self.values = np.array([func(t) for t in times])
+
+    def index(self, t):
+        return int(round(t * self.fps)) % len(self.values)
+
+    def at(self, t):
+        return self.values[self.index(t)]
+
+    def at_frame(self, frame):
+        return self.values[frame % len(self.values)]
+
+
 class CoreFetchExecution(VMobject):
     def __init__(self,
                  irqn:int,
@@ -43,40 +83,481 @@ class CoreFetchExecution(VMobject):
                         ).match_width(self.box).scale(.8).move_to(
             self.box.get_center()
         )
-        self.gear.add_updater(
-                lambda obj, dt: obj.rotate(PI * dt * 6)
-        )
+        # 4 teeth -> the gear looks the same every quarter turn
+        self.gear_angles = TimeTable(lambda t: PI * t * 6, period=1/12)
+        self.gear_time = 0
+        self.gear_angle = 0
+        self.gear.add_updater(self.spin_gear)
         self.gear.suspend_updating()
         self.add(self.box, self.gear, self.txt)
 
+    def spin_gear(self, obj, dt):
+        self.gear_time += dt
+        angle = self.gear_angles.at(self.gear_time)
+        obj.rotate(angle - self.gear_angle)
+        self.gear_angle = angle
+
 class TimeLine(VMobject):
     def __init__(self,
                  time=10,
                  **kwargs):
         super().__init__(*kwargs)
-        self.time_passed = 0
+        self.frame = 0
         self.time = time
         self.nline = NumberLine(
             x_range=(0, 14, 1),color=BLUE,include_ticks=False,include_tip=True,
         )
         self.dot = Dot().set_color(YELLOW).move_to(self.nline.number_to_point(0))
         self.add(self.nline, self.dot)
+        # offsets of the dot from the start of the line, the line can still be moved around
+        start = self.nline.get_start()
+        self.offsets = TimeTable(
+            lambda t: self.nline.number_to_point(self.nline.x_range[1] * t/self.time) - start,
+            period=self.time
+        )
 
         self.dot.add_updater(
             self.move_with_time
         )
 
     def move_with_time(self, obj, dt):
-        self.time_passed += dt
-        if self.time_passed > self.time:
-            self.time_passed = 0
-        obj.move_to(self.nline.number_to_point(
-            self.nline.x_range[1] * self.time_passed/self.time
-        ))
+        self.frame += round(dt * self.offsets.fps)
+        obj.move_to(self.nline.get_start() + self.offsets.at_frame(self.frame))
+
 
+class Follow(VMobject):
+    # polyline through points owned by other mobjects, unlike always_redraw it keeps
+    # one mobject and only rewrites its points when one of the anchors actually moved
+    def __init__(self,
+                 get_anchors,
+                 close=False,
+                 **kwargs):
+        super().__init__(**kwargs)
+        self.get_anchors = get_anchors
+        self.close = close
+        self.anchors = None
+        self.refresh()
+        self.add_updater(lambda obj: obj.refresh())
+
+    def refresh(self):
+        anchors = np.array(self.get_anchors(), dtype=float)
+        if self.anchors is not None and np.array_equal(anchors, self.anchors):
+            return self
+        self.anchors = anchors
+        if self.close:
+            anchors = np.vstack([anchors, anchors[:1]])
+        self.set_points_as_corners(anchors)
+        return self
+
+
+def map_data(data, func):
+    # older manimlib keeps a dict of arrays, newer a single structured array
+    if isinstance(data, dict):
+        return {key: func(value) for key, value in data.items()}
+    return func(data)
+
+
+def read_only_view(arr):
+    view = arr.view()
+    view.flags.writeable = False
+    return view
+
+
+def is_frozen(data):
+    if isinstance(data, dict):
+        return any(not value.flags.writeable for value in data.values())
+    return not data.flags.writeable
+
+
+def snapshot(mob):
+    # copy of mob whose family shares the point/color data with the source (read only),
+    # the data is only copied by thaw(), i.e. once the snapshot is about to change.
+    # the source must not be changed in place until then, which holds for the
+    # copy-and-fly-somewhere pattern used for stacking
+    family = mob.get_family()
+    datas = [m.data for m in family]
+    for m in family:
+        m.data = map_data(m.data, lambda arr: arr[:0])
+    try:
+        result = mob.copy()
+    finally:
+        for m, data in zip(family, datas):
+            m.data = data
+    for m, data in zip(result.get_family(), datas):
+        m.data = map_data(data, read_only_view)
+    return result
+
+
+def thaw(mob):
+    for m in mob.get_family():
+        if is_frozen(m.data):
+            m.data = map_data(m.data, np.array)
+    return mob
+
+
+class SnapshotTransform(Transform):
+    # Transform that accepts a snapshot as its source
+    def begin(self):
+        thaw(self.mobject)
+        super().begin()
+
+
+class GlyphAtlas:
+    # digit glyphs typeset once (or taken from words already on screen) and reused,
+    # update_value only swaps the glyphs of digits that changed instead of
+    # re-typesetting the whole 32 bit word
+    def __init__(self, **text_kwargs):
+        self.text_kwargs = text_kwargs
+        self.templates = {}
+        self.font_scale = None
+        # size of the words on screen relative to the templates (layouts scale words
+        # after learn()), measured on the glyph being replaced
+        self.display_scale = 1
+        self.shown = WeakKeyDictionary()
+
+    @staticmethod
+    def byte_digits(value, binary):
+        return [
+            f'{(value >> (8 * (3 - b))) & 0xff:{"08b" if binary else "02x"}}'
+            for b in range(4)
+        ]
 
-class Intro(InteractiveScene):
+    @staticmethod
+    def byte_glyphs(word, b, n_digits):
+        # digits are the last glyphs of each byte's text, anything before them is a prefix
+        txt = word.get_byte(b).value_txt
+        return txt, len(txt) - n_digits
+
+    def learn(self, word, value, binary=False):
+        # words already on screen give glyphs in exactly the right font for free, at the
+        # size they have now (glyph() rescales them if the words are scaled later)
+        for b, digits in enumerate(self.byte_digits(value, binary)):
+            txt, offset = self.byte_glyphs(word, b, len(digits))
+            for attr in ('font', 'slant', 'weight'):
+                if getattr(txt, attr, None) is not None:
+                    self.text_kwargs.setdefault(attr, getattr(txt, attr))
+            for j, char in enumerate(digits):
+                self.templates.setdefault(char, txt[offset + j].copy())
+        self.shown[word] = value
+        return self
+
+    def typeset(self, char):
+        # digits no word has shown yet, in the words' font, scaled by one factor for all
+        # of them (measured on a learned glyph) so relative glyph heights stay as typeset
+        glyph = Text(char, **self.text_kwargs)
+        if self.font_scale is None:
+            if self.templates:
+                known, template = next(iter(self.templates.items()))
+                self.font_scale = template.get_height() / Text(known, **self.text_kwargs).get_height()
+            else:
+                self.font_scale = 1
+        return glyph.scale(self.font_scale)
+
+    def glyph(self, char, like, like_char=None):
+        # like shows like_char, comparing it with that template gives the display scale,
+        # one factor for all digits so their relative heights stay as typeset
+        if like_char in self.templates and self.templates[like_char].get_height() > 0:
+            self.display_scale = like.get_height() / self.templates[like_char].get_height()
+        if char not in self.templates:
+            self.templates[char] = self.typeset(char)
+        glyph = self.templates[char].copy().scale(self.display_scale)
+        # hex digits have no descenders, bottoms sit on the baseline
+        glyph.move_to(like, aligned_edge=DOWN)
+        glyph.set_color(like.get_color())
+        return glyph
+
+    def update_value(self, word, value, binary=False):
+        old = self.shown.get(word)
+        old_digits = self.byte_digits(old, binary) if old is not None else None
+        for b, digits in enumerate(self.byte_digits(value, binary)):
+            if old_digits is not None and old_digits[b] == digits:
+                continue
+            txt, offset = self.byte_glyphs(word, b, len(digits))
+            for j, char in enumerate(digits):
+                if old_digits is None or old_digits[b][j] != char:
+                    like_char = old_digits[b][j] if old_digits is not None else None
+                    txt.replace_submobject(offset + j, self.glyph(char, txt[offset + j], like_char))
+        self.shown[word] = value
+        return word
+
+
+class StackFramePush(LaggedStart):
+    # whole exception stacking sequence as one play() call:
+    # for every register the memory word at sp, sp - 4, ... takes its value,
+    # then the register (a snapshot) flies into it, registers start staggered by lag_ratio.
+    # extras: {i: animation} runs alongside the i-th register.
+    # the snapshots are part of the group the scene adds (and draws) from the first
+    # frame, long before their SnapshotTransform begins, so all of them are thawed here
+    def __init__(self,
+                 mem,
+                 regs,
+                 values,
+                 sp,
+                 word_time=.2,
+                 move_time=.5,
+                 extras=None,
+                 lag_ratio=.5,
+                 **kwargs):
+        self.mem = mem
+        self.regs = list(regs)
+        self.addresses = [sp - 4 * i for i in range(len(values))]
+        extras = extras or {}
+
+        # same thing mem.animate.set_value_at does, for all words at once
+        target = mem.copy()
+        for address, value in zip(self.addresses, values):
+            target.set_value_at(address, value)
+
+        slots = []
+        for i, (reg, address) in enumerate(zip(regs, self.addresses)):
+            word = target.get_word_at(address)
+            slot = Succession(
+                Transform(mem.get_word_at(address), word, run_time=word_time),
+                SnapshotTransform(reg, word, run_time=move_time),
+            )
+            if i in extras:
+                slot = AnimationGroup(slot, extras[i])
+            slots.append(slot)
+        super().__init__(*slots, lag_ratio=lag_ratio, **kwargs)
+
+    def begin(self):
+        for reg in self.regs:
+            thaw(reg)
+        super().begin()
+
+
+class StackFramePop(LaggedStart):
+    # reverse of StackFramePush: the stacked copies fly back into the registers,
+    # last pushed first, and the registers take their values once covered
+    def __init__(self,
+                 stacked,
+                 regs,
+                 values,
+                 atlas=None,
+                 lag_ratio=.5,
+                 **kwargs):
+        self.regs = list(reversed(regs))
+        self.values = list(reversed(values))
+        self.atlas = atlas
+        anims = []
+        for from_reg, to, value in zip(reversed(stacked), self.regs, self.values):
+            target = to.copy()
+            self.set_word_value(target.get_word(), value)
+            anims.append(SnapshotTransform(from_reg, target))
+        super().__init__(*anims, lag_ratio=lag_ratio, **kwargs)
+
+    def set_word_value(self, word, value):
+        if self.atlas is None:
+            word.update_value(value)
+        else:
+            self.atlas.update_value(word, value)
+
+    def finish(self):
+        super().finish()
+        for reg, value in zip(self.regs, self.values):
+            self.set_word_value(reg.get_word(), value)
+
+
+class MemoryView(VGroup):
+    # memory backed by a numpy word array, only `window` rows exist as mobjects.
+    # scrolling moves the row that leaves the window to the other end and only
+    # relabels that one, so the size of the region costs nothing on screen
+    def __init__(self,
+                 start_address,
+                 size,
+                 window=8,
+                 mem_dir=DOWN,
+                 word_width=2.5,
+                 word_height=.5,
+                 color=BLUE,
+                 opacity=.2,
+                 **kwargs):
+        super().__init__(**kwargs)
+        self.start_address = start_address
+        self.words = np.zeros(size // 4, dtype=np.uint32)
+        self.written = np.zeros(size // 4, dtype=bool)
+        self.window = min(window, len(self.words))
+        self.word_width = word_width
+        self.word_height = word_height
+        self.color = color
+        self.opacity = opacity
+        self.top = 0
+        # rows are the submobjects in window order, so copies (.animate targets) get their own
+        self.add(*(self.make_row(i).shift(mem_dir * word_height * i) for i in range(self.window)))
+        self.center()
+
+    @property
+    def rows(self):
+        return self.submobjects
+
+    def index_of(self, address):
+        index = (address - self.start_address) // 4
+        if not 0 <= index < len(self.words):
+            raise ValueError(f'address {address:#010x} is outside of this memory')
+        return index
+
+    def address_of(self, index):
+        return self.start_address + 4 * index
+
+    def value_text(self, index):
+        if not self.written[index]:
+            return '-' * 10
+        return f'{self.words[index]:#010x}'
+
+    def make_row(self, index):
+        box = Rectangle(width=self.word_width, height=self.word_height,
+                        color=self.color, fill_opacity=self.opacity, stroke_width=1)
+        row = VGroup(VMobject(), box, VMobject())
+        row.index = index
+        return self.label_row(row)
+
+    def label_row(self, row):
+        box = row[1]
+        value = Text(self.value_text(row.index)).set_width(box.get_width() * .8).move_to(box)
+        # sized like a written value, an unwritten one is just dashes
+        address = Text(f'{self.address_of(row.index):#010x}').set_width(box.get_width() * .8).next_to(box, LEFT)
+        row.replace_submobject(0, value)
+        row.replace_submobject(2, address)
+        return row
+
+    def relabel_value(self, row):
+        box = row[1]
+        value = Text(self.value_text(row.index)).set_width(box.get_width() * .8).move_to(box)
+        row.replace_submobject(0, value)
+        return row
+
+    def row_step(self):
+        if self.window > 1:
+            return self.rows[1][1].get_center() - self.rows[0][1].get_center()
+        return DOWN * self.rows[0][1].get_height()
+
+    def get_row(self, index):
+        if self.top <= index < self.top + self.window:
+            return self.rows[index - self.top]
+        return None
+
+    def scroll(self, n):
+        step = self.row_step()
+        rows = list(self.rows)
+        for _ in range(abs(n)):
+            if n > 0 and self.top + self.window < len(self.words):
+                row = rows.pop(0)
+                last = rows[-1] if rows else row
+                row.shift(last[1].get_center() + step - row[1].get_center())
+                row.index = self.top + self.window
+                rows.append(row)
+                self.top += 1
+            elif n < 0 and self.top > 0:
+                row = rows.pop()
+                first = rows[0] if rows else row
+                row.shift(first[1].get_center() - step - row[1].get_center())
+                self.top -= 1
+                row.index = self.top
+                rows.insert(0, row)
+            else:
+                break
+            self.label_row(row)
+        self.remove(*self.submobjects)
+        self.add(*rows)
+        return self
+
+    def scroll_to(self, address):
+        index = self.index_of(address)
+        if index < self.top:
+            self.scroll(index - self.top)
+        elif index >= self.top + self.window:
+            self.scroll(index - self.top - self.window + 1)
+        return self
+
+    def set_value_at(self, address, value):
+        index = self.index_of(address)
+        self.words[index] = value
+        self.written[index] = True
+        row = self.get_row(index)
+        if row is not None:
+            self.relabel_value(row)
+        return self
+
+    def get_value_at(self, address):
+        index = self.index_of(address)
+        return int(self.words[index]) if self.written[index] else None
+
+    def get_word_at(self, address):
+        # [0] value text, [1] box, like Memory words. only rows in the window exist,
+        # scroll_to the address first
+        row = self.get_row(self.index_of(address))
+        if row is None:
+            raise ValueError(f'address {address:#010x} is not in the visible window')
+        return row
+
+
+def mobject_state(mobjects):
+    # digest of everything the renderer reads from the mobjects
+    digest = hashlib.blake2b(digest_size=16)
+    for mob in mobjects:
+        digest.update(id(mob).to_bytes(8, 'little'))
+        for arr in (mob.data.values() if isinstance(mob.data, dict) else [mob.data]):
+            digest.update(arr.tobytes())
+        digest.update(repr(sorted(mob.uniforms.items())).encode())
+    return digest.digest()
+
+
+class HoldFrameScene(InteractiveScene):
+    # during wait()s updaters keep running (TimeLine's dot long after it reached the end)
+    # so every frame is drawn and read back although nothing changed. when writing to a
+    # file the scene state is hashed before drawing, and an unchanged frame is neither
+    # drawn nor read back, the previous raw frame goes to the encoder again
+    def setup(self):
+        super().setup()
+        self.last_state = None
+        # raw frames of the current scene state, per read arguments (e.g. dtype)
+        self.frames = {}
+        self.skipped_capture = None
+        self.frame_unchanged = False
+        if self.window is None:
+            self.camera.capture = self.capture_changed(self.camera.capture)
+            self.camera.get_raw_fbo_data = self.read_changed(self.camera.get_raw_fbo_data)
+
+    def capture_changed(self, capture):
+        def wrapper(*mobjects, **kwargs):
+            state = mobject_state([self.frame, *self.get_mobject_family_members()])
+            self.frame_unchanged = state == self.last_state and bool(self.frames)
+            self.last_state = state
+            if self.frame_unchanged:
+                # drawn only if someone reads the frame in a way that isn't cached yet
+                self.skipped_capture = lambda: capture(*mobjects, **kwargs)
+            else:
+                self.frames = {}
+                self.skipped_capture = None
+                capture(*mobjects, **kwargs)
+        return wrapper
+
+    def read_changed(self, read):
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            if self.frame_unchanged and key in self.frames:
+                return self.frames[key]
+            if self.skipped_capture is not None:
+                self.skipped_capture()
+                self.skipped_capture = None
+            self.frames[key] = read(*args, **kwargs)
+            return self.frames[key]
+        return wrapper
+
+
+class Intro(HoldFrameScene):
     def construct(self) -> None:
+        # one rising edge on EXTI8, the timeline tells which vector the core fetches
+        exti = EXTI()
+        exti.configure(8, rising=True)
+        levels = np.zeros((2, exti.n_lines), dtype=bool)
+        levels[1, 8] = True
+        nvic_state = NVIC()
+        nvic_state.enable(EXTI8_IRQN)
+        timeline = Simulator(nvic_state).run(*exti.requests(levels, cycles_per_sample=1))
+        fetch = timeline[timeline['kind'] == 'fetch'][0]
+        irqn, isr_vector = int(fetch['irq']), int(fetch['value'])
+
         cpu_normal_execution_src = CodeBlock(
             src=NORMAL_SOURCE_CODE,
             scene=self,
@@ -118,39 +599,17 @@ class Intro(InteractiveScene):
         cpu_regs = VGroup()
         cpu_regs_left = VGroup()
         cpu_regs_right = VGroup()
-        cpu_reg_xpsr = Register(
-            word_data=WordData(value=0x1000000, opacity=0.1),
-            label='xpsr',dir=Direction.LEFT
-        )
-        cpu_reg_pc = Register(
-            word_data=WordData(value=0x8000208, opacity=.1),
-            label='pc',dir=Direction.LEFT
-        )
-        cpu_reg_lr = Register(
-            word_data=WordData(value=0x8000205, opacity=.1),
-            label='lr',dir=Direction.LEFT
-        )
-        cpu_reg_r12 = Register(
-            word_data=WordData(value=0x20, opacity=.1),
-            label='r12',dir=Direction.LEFT
-        )
-
-        cpu_reg_r3 = Register(
-            word_data=WordData(value=0xe000e100, opacity=.1),
-            label='r3',dir=Direction.LEFT
-        )
-        cpu_reg_r2 = Register(
-            word_data=WordData(value=0x800000, opacity=.1),
-            label='r2',dir=Direction.LEFT
-        )
-        cpu_reg_r1 = Register(
-            word_data=WordData(value=0x10, opacity=.1),
-            label='r1',dir=Direction.LEFT
-        )
-        cpu_reg_r0 = Register(
-            word_data=WordData(value=0x40020000, opacity=.1),
-            label='r0',dir=Direction.LEFT
-        )
+        cpu_reg_list = [
+            Register(
+                word_data=WordData(value=value, opacity=.1),
+                label=label, dir=Direction.LEFT
+            )
+            for label, value in CPU_REGS
+        ]
+        (
+            cpu_reg_xpsr, cpu_reg_pc, cpu_reg_lr, cpu_reg_r12,
+            cpu_reg_r3, cpu_reg_r2, cpu_reg_r1, cpu_reg_r0
+        ) = cpu_reg_list
 
         cpu_regs_left.add(cpu_reg_xpsr, cpu_reg_pc, cpu_reg_lr, cpu_reg_r12)
         cpu_regs_left.arrange(DOWN)
@@ -160,6 +619,9 @@ class Intro(InteractiveScene):
         cpu_regs.scale(.4)
         cpu_regs.arrange(RIGHT).to_edge(DL)
         cpu_reg_box = SurroundingRectangle(cpu_regs, color=BLUE_D, stroke_width=.7)
+        hex_atlas = GlyphAtlas()
+        for reg, (_, value) in zip(cpu_reg_list, CPU_REGS):
+            hex_atlas.learn(reg.get_word(), value)
         cpu_regs.add(cpu_reg_box)
 
         cpu_ic  = Ic(
@@ -209,6 +671,9 @@ class Intro(InteractiveScene):
             label='NVIC_ISER', dir=Direction.LEFT
         )
         enable_bit = nvic_enable_register.get_word().get_byte(1).value_txt[0]
+        bin_atlas = GlyphAtlas()
+        bin_atlas.learn(nvic_enable_register.get_word(), INTERRUPT_BIT, binary=True)
+        bin_atlas.learn(nvic_pending_register.get_word(), 0x0, binary=True)
         
         nvic_regs.add(nvic_pending_register, nvic_enable_register)
         nvic_regs.scale(.5)
@@ -226,12 +691,12 @@ class Intro(InteractiveScene):
         self.wait(2)
         nvic_ic.resume(0)
         self.play(Indicate(interrupt_line, color=RED_D), run_time=1)
-        nvic_pending_register.get_word().update_value(INTERRUPT_BIT)
+        bin_atlas.update_value(nvic_pending_register.get_word(), INTERRUPT_BIT, binary=True)
         pending_bit = nvic_pending_register.get_word().get_byte(1).value_txt[0]
         self.play(Indicate(pending_bit, color=RED,scale_factor=4), run_time=1)
         pending_bit.set_color(RED)
-        pending_bit_cp = copy.deepcopy(pending_bit)
-        enable_bit_cp = copy.deepcopy(enable_bit)
+        pending_bit_cp = snapshot(pending_bit)
+        enable_bit_cp = snapshot(enable_bit)
         self.embed()
         
         REF:Final = nvic_regs.get_corner(DL) + DOWN
@@ -240,9 +705,9 @@ class Intro(InteractiveScene):
             "assume other registers are valid like priority registers..."
         ).scale(.35).move_to(REF + 3 * RIGHT + DOWN/2)
         self.play(
-            pending_bit_cp.animate.move_to(REF).scale(4.5),
+            thaw(pending_bit_cp).animate.move_to(REF).scale(4.5),
             Write(and_txt),
-            enable_bit_cp.animate.move_to(REF + 2 * RIGHT).scale(4.5),
+            thaw(enable_bit_cp).animate.move_to(REF + 2 * RIGHT).scale(4.5),
             Write(assumtion_txt_1),
             lag_ratio=0.5,
             run_time=3,
@@ -251,10 +716,10 @@ class Intro(InteractiveScene):
         true_txt = Text("True i.e let's interrupt the core").set_color(GREEN).scale(.7).move_to(REF + 2*RIGHT)
         self.play(Transform(all_v1, true_txt), run_time=2)
         self.wait(.5)
-        connection_between_nvic_and_cpu = always_redraw(lambda: Line(
-            start=nvic_ic.get_right_lines()[0].get_start(),
-            end=cpu_ic.get_left_lines()[3].get_end(), color=[GREEN, TEAL_B]
-        ))
+        connection_between_nvic_and_cpu = Follow(lambda: [
+            nvic_ic.get_right_lines()[0].get_start(),
+            cpu_ic.get_left_lines()[3].get_end()
+        ], color=[GREEN, TEAL_B])
         self.play(nvic_regs.animate.next_to(nvic_ic, UP), run_time=.3)
         self.play(
             nvic.animate.to_edge(UL),
@@ -263,7 +728,7 @@ class Intro(InteractiveScene):
             run_time=2
         )
         self.play(FadeOut(all_v1), run_time=.4)
-        nvic_irqn_to_cpu_indicator = LabeledDot(color=ORANGE, label='23').scale(.4).move_to(
+        nvic_irqn_to_cpu_indicator = LabeledDot(color=ORANGE, label=str(irqn)).scale(.4).move_to(
             connection_between_nvic_and_cpu.get_start())
         self.add(nvic_irqn_to_cpu_indicator)
         self.play(
@@ -280,17 +745,17 @@ class Intro(InteractiveScene):
         # self.play(FadeOut(nvic_irqn_to_cpu_indicator), run_time=.2)
         nvic_ic.suspend(0)
         # self.wait(4)
-        cpu_showing_regs = always_redraw(lambda: Polygon(
-            *[
+        cpu_showing_regs = Follow(lambda: [
                 cpu_ic.body.get_corner(DL),
                 cpu_ic.body.get_corner(DR),
                 cpu_reg_box.get_corner(UR),
                 cpu_reg_box.get_corner(UL)
             ],
+            close=True,
             color=BLUE,
             fill_opacity=.2,
             stroke_width=.4,
-        ))
+        )
         cpu_showing_regs.z_index=-1
 
         self.play(
@@ -304,14 +769,14 @@ class Intro(InteractiveScene):
         
         self.play(ShowCreation(mem))
         ## now stacking will start
-        cpu_reg_xpsr_cp = copy.deepcopy(cpu_reg_xpsr)
-        cpu_reg_pc_cp = copy.deepcopy(cpu_reg_pc)
-        cpu_reg_lr_cp = copy.deepcopy(cpu_reg_lr)
-        cpu_reg_r12_cp = copy.deepcopy(cpu_reg_r12)
-        cpu_reg_r3_cp = copy.deepcopy(cpu_reg_r3)
-        cpu_reg_r2_cp = copy.deepcopy(cpu_reg_r2)
-        cpu_reg_r1_cp = copy.deepcopy(cpu_reg_r1)
-        cpu_reg_r0_cp = copy.deepcopy(cpu_reg_r0)
+        cpu_reg_xpsr_cp = snapshot(cpu_reg_xpsr)
+        cpu_reg_pc_cp = snapshot(cpu_reg_pc)
+        cpu_reg_lr_cp = snapshot(cpu_reg_lr)
+        cpu_reg_r12_cp = snapshot(cpu_reg_r12)
+        cpu_reg_r3_cp = snapshot(cpu_reg_r3)
+        cpu_reg_r2_cp = snapshot(cpu_reg_r2)
+        cpu_reg_r1_cp = snapshot(cpu_reg_r1)
+        cpu_reg_r0_cp = snapshot(cpu_reg_r0)
         # self.add(
         #     cpu_reg_xpsr_cp, cpu_reg_pc_cp, cpu_reg_lr_cp, cpu_reg_r12_cp, cpu_reg_r3_cp,
         #     cpu_reg_r2_cp, cpu_reg_r1_cp, cpu_reg_r0_cp
@@ -337,8 +802,8 @@ class Intro(InteractiveScene):
         cpu_ic.suspend(0)
         cpu_ic.resume(1)
 
-        cfe = CoreFetchExecution(23).scale(.7).next_to(cpu_normal_execution_src, RIGHT)
-        cfe_txt_result = Text('0x0000009c').match_width(cfe.txt).move_to(cfe.txt.get_center())
+        cfe = CoreFetchExecution(irqn).scale(.7).next_to(cpu_normal_execution_src, RIGHT)
+        cfe_txt_result = Text(f'{isr_vector:#010x}').match_width(cfe.txt).move_to(cfe.txt.get_center())
         vector_table = Memory(
             start_address=0x0000008c, size=4*9,
             word_data=WordData(
@@ -347,27 +812,26 @@ class Intro(InteractiveScene):
             ),
             addr_dir=Direction.LEFT
         ).scale(.4).to_edge(DR)
-        vector_table.set_value_at(0x0000009c, 0x08000220)
+        vector_table.set_value_at(isr_vector, 0x08000220)
         pointer_to_vt = Arrow(
                 stroke_width=.7,
                 start=cfe.get_corner(DR),
-                end=vector_table.get_word_at(0x9c)[1].get_center() + LEFT/2).set_color(YELLOW_E)
+                end=vector_table.get_word_at(isr_vector)[1].get_center() + LEFT/2).set_color(YELLOW_E)
 
         self.add(vector_table ,cfe, isr_code)
         cfe.gear.resume_updating()
 
-        for i in range(len(values)):
-            if i == 5:
-                self.play(Transform(cfe.txt, cfe_txt_result), run_time=.2)
-            elif i == 6:
-                self.play(ShowCreation(pointer_to_vt), run_time=.2)
-            self.play(mem.animate.set_value_at(address_start, values[i]), run_time=.2)
-            self.play(Transform(current_regs_to_transform[i], mem.get_word_at(address_start)), run_time=.5)
-            address_start -= 4
-        isr_entry_cp = copy.deepcopy(vector_table.get_word_at(0x9c)[0])
+        self.play(StackFramePush(
+            mem, current_regs_to_transform, values, address_start,
+            extras={
+                5: Transform(cfe.txt, cfe_txt_result, run_time=.2),
+                6: ShowCreation(pointer_to_vt, run_time=.2),
+            }
+        ))
+        isr_entry_cp = snapshot(vector_table.get_word_at(isr_vector)[0])
         self.play(
             FadeOut(cpu_reg_pc.get_word()),
-            isr_entry_cp.animate.move_to(cpu_reg_pc.get_word().get_center())
+            thaw(isr_entry_cp).animate.move_to(cpu_reg_pc.get_word().get_center())
         )
         pc_to_isr_pointer = Arrow(
                 start=isr_entry_cp.get_center(),
@@ -377,7 +841,7 @@ class Intro(InteractiveScene):
         cpu_ic.resume(2)
         cpu_ic.suspend(1)
         isr_code.set_updaters()
-        nvic_pending_register.get_word().update_value(0x0)
+        bin_atlas.update_value(nvic_pending_register.get_word(), 0x0, binary=True)
         pending_bit = nvic_pending_register.get_word().get_byte(1).value_txt[0]
         self.play(Indicate(pending_bit, color=ORANGE,scale_factor=4), run_time=.3)
 
@@ -399,15 +863,15 @@ class Intro(InteractiveScene):
         )
         isr_code.resume()
         cpu_ic.resume(2)
-        cpu_reg_lr.get_word().update_value(0xfffffff9)
+        hex_atlas.update_value(cpu_reg_lr.get_word(), 0xfffffff9)
         self.wait(2.5)
         
-        cpu_reg_xpsr.get_word().update_value(0x21000027)
-        cpu_reg_r12.get_word().update_value(0x100)
-        cpu_reg_r3.get_word().update_value(0x40013000)
-        cpu_reg_r2.get_word().update_value(0x0)
-        cpu_reg_r1.get_word().update_value(0x40)
-        cpu_reg_r0.get_word().update_value(0x100)
+        hex_atlas.update_value(cpu_reg_xpsr.get_word(), 0x21000027)
+        hex_atlas.update_value(cpu_reg_r12.get_word(), 0x100)
+        hex_atlas.update_value(cpu_reg_r3.get_word(), 0x40013000)
+        hex_atlas.update_value(cpu_reg_r2.get_word(), 0x0)
+        hex_atlas.update_value(cpu_reg_r1.get_word(), 0x40)
+        hex_atlas.update_value(cpu_reg_r0.get_word(), 0x100)
         isr_code.stop()
         cpu_ic.suspend(2)
         self.wait(.5)
@@ -417,10 +881,7 @@ class Intro(InteractiveScene):
             cpu_reg_r3, cpu_reg_r2, cpu_reg_r1, cpu_reg_r0
         ]
 
-        for value, from_reg, to in zip(reversed(values), reversed(current_regs_to_transform),
-                                   reversed(current_regs_to_target)):
-            to.get_word().update_value(value)
-            self.play(Transform(from_reg, to))
+        self.play(StackFramePop(current_regs_to_transform, current_regs_to_target, values, atlas=hex_atlas))
         self.remove(isr_entry_cp)
         cpu_ic.resume(0)
         cpu_normal_execution_src.resume()
@@ -436,6 +897,68 @@ class Intro(InteractiveScene):
 
 
 
+class InterruptLatencies(HoldFrameScene):
+    def construct(self) -> None:
+        rng = np.random.default_rng(0)
+        nvic_state = NVIC(n_irqs=97)
+        irqs = np.unique(EXTI_IRQN[EXTI_IRQN >= 0])
+        nvic_state.enable(irqs)
+        nvic_state.set_priority(irqs, rng.integers(0, 16, len(irqs)))
+        times = np.sort(rng.uniform(0, 2_000_000, 5000))
+        timeline = Simulator(
+            nvic_state, isr_cycles=rng.integers(20, 400, nvic_state.n_irqs)
+        ).run(times, rng.choice(irqs, len(times)))
+
+        _, cycles = latencies(timeline)
+        counts, edges = np.histogram(cycles, bins=30)
+        bars = VGroup(*[
+            Rectangle(width=.3, height=max(5 * c / counts.max(), 1e-3),
+                      color=TEAL, fill_opacity=.8, stroke_width=.5)
+            for c in counts
+        ]).arrange(RIGHT, buff=.05, aligned_edge=DOWN).center()
+        axis = Line(bars.get_corner(DL), bars.get_corner(DR), color=WHITE)
+        low = Text(f'{int(edges[0])}').scale(.4).next_to(axis, DOWN).align_to(axis, LEFT)
+        high = Text(f'{int(edges[-1])} cycles').scale(.4).next_to(axis, DOWN).align_to(axis, RIGHT)
+        title = Text(f'entry latency of {len(cycles)} interrupts').scale(.6).to_edge(UP)
+
+        self.add(axis, low, high, title)
+        self.play(LaggedStart(*[GrowFromEdge(bar, DOWN) for bar in bars], lag_ratio=.05), run_time=2)
+        self.wait()
+
+
+class VectorTable(HoldFrameScene):
+    def construct(self) -> None:
+        # the whole STM32F446 vector table (16 system exceptions + 97 irqs) scrolling
+        # through an 8 row window, down to the EXTI9_5 entry Intro jumps through
+        n_irqs = 97
+        table = MemoryView(start_address=0x0, size=4 * (16 + n_irqs), window=8).scale(.6)
+        table.set_value_at(0x0, 0x20020000)  # initial sp, top of the 128KB sram
+        for exception in range(1, 16):
+            if exception not in RESERVED_EXCEPTIONS:
+                table.set_value_at(4 * exception, DEFAULT_HANDLER)
+        table.set_value_at(0x4, RESET_HANDLER)
+        for irq in range(n_irqs):
+            table.set_value_at(vector_address(irq), DEFAULT_HANDLER)
+        isr_vector = vector_address(EXTI8_IRQN)
+        table.set_value_at(isr_vector, 0x08000220)
+        title = Text('vector table').scale(.6).next_to(table, UP)
+
+        def scroll_until(address):
+            # one row per step, the rows leaving the window are relabelled at the other end
+            index = table.index_of(address)
+            while not table.top <= index < table.top + table.window:
+                table.scroll(1 if index >= table.top else -1)
+                self.wait(1 / 15)
+
+        self.add(table, title)
+        self.wait()
+        scroll_until(isr_vector)
+        self.play(Indicate(table.get_word_at(isr_vector)))
+        self.wait()
+        scroll_until(vector_address(n_irqs - 1))
+        self.wait()
+
+
 class Test(InteractiveScene):
     def construct(self) -> None:
         ct = CodeBlock(
@@ -0,0 +1,203 @@
+from typing import Final
+
+import numpy as np
+
+# Cortex-M4 timings in core cycles, zero wait state memory
+ENTRY_CYCLES: Final = 12
+TAIL_CHAIN_CYCLES: Final = 6
+EXIT_CYCLES: Final = 10
+
+# STM32F446 EXTI line -> IRQ number, -1 where the line has no interrupt of its own
+EXTI_IRQN: Final = np.array([
+    6, 7, 8, 9, 10,                 # EXTI0..4
+    23, 23, 23, 23, 23,             # EXTI9_5
+    40, 40, 40, 40, 40, 40,         # EXTI15_10
+    1,                              # PVD
+    41,                             # RTC alarm
+    42,                             # OTG FS wakeup
+    -1, -1,
+    2,                              # tamper / timestamp
+    3,                              # RTC wakeup
+])
+
+EVENT_DTYPE: Final = np.dtype([
+    ('time', np.float64),   # core cycles
+    ('kind', 'U12'),
+    ('irq', np.int16),
+    ('value', np.int64),    # vector address for 'fetch', latency for 'enter', -1 otherwise
+])
+
+
+def irq_bit(irq):
+    return 1 << (irq % 32)
+
+
+def vector_address(irq, vtor=0x0):
+    return vtor + (irq + 16) * 4
+
+
+def to_bits(words, n):
+    # uint32 register words -> one bool per bit, bit i of the result is irq i
+    return np.unpackbits(words.astype('<u4').view(np.uint8), bitorder='little')[:n].astype(bool)
+
+
+def set_bits(words, irqs):
+    irqs = np.atleast_1d(irqs)
+    np.bitwise_or.at(words, irqs >> 5, (np.uint32(1) << (irqs & 31)).astype(np.uint32))
+
+
+def clear_bits(words, irqs):
+    irqs = np.atleast_1d(irqs)
+    np.bitwise_and.at(words, irqs >> 5, ~(np.uint32(1) << (irqs & 31)).astype(np.uint32))
+
+
+class NVIC:
+    def __init__(self, n_irqs=240, priority_bits=4, vtor=0x0):
+        self.n_irqs = n_irqs
+        self.priority_bits = priority_bits
+        self.vtor = vtor
+        n_words = (n_irqs + 31) // 32
+        self.iser = np.zeros(n_words, dtype=np.uint32)
+        self.ispr = np.zeros(n_words, dtype=np.uint32)
+        self.iabr = np.zeros(n_words, dtype=np.uint32)
+        self.ipr = np.zeros(n_irqs, dtype=np.uint8)
+
+    def enable(self, irqs):
+        set_bits(self.iser, irqs)
+
+    def set_pending(self, irqs):
+        set_bits(self.ispr, irqs)
+
+    def set_priority(self, irqs, priority):
+        # only the upper priority_bits of every IPR byte are implemented
+        self.ipr[irqs] = (np.asarray(priority) << (8 - self.priority_bits)) & 0xff
+
+    def priority(self, irqs):
+        return self.ipr[irqs] >> (8 - self.priority_bits)
+
+    def is_pending(self, irq):
+        return bool(self.ispr[irq >> 5] & irq_bit(irq))
+
+    def highest_pending(self, running_priority=np.inf):
+        # enabled, pending and not already active, lowest priority value wins, then lowest irq
+        ready = np.flatnonzero(to_bits(self.ispr & self.iser & ~self.iabr, self.n_irqs))
+        if not len(ready):
+            return None
+        priorities = self.priority(ready)
+        best = np.argmin(priorities)
+        if priorities[best] >= running_priority:
+            return None
+        return int(ready[best])
+
+    def activate(self, irq):
+        clear_bits(self.ispr, irq)
+        set_bits(self.iabr, irq)
+
+    def deactivate(self, irq):
+        clear_bits(self.iabr, irq)
+
+
+class EXTI:
+    def __init__(self, n_lines=23):
+        self.n_lines = n_lines
+        self.imr = 0
+        self.rtsr = 0
+        self.ftsr = 0
+
+    def configure(self, lines, rising=True, falling=False):
+        mask = int(np.bitwise_or.reduce(1 << np.atleast_1d(lines)))
+        self.imr |= mask
+        self.rtsr = self.rtsr | mask if rising else self.rtsr & ~mask
+        self.ftsr = self.ftsr | mask if falling else self.ftsr & ~mask
+
+    def mask_bits(self, mask):
+        return (mask >> np.arange(self.n_lines)) & 1 == 1
+
+    def requests(self, levels, cycles_per_sample):
+        # levels: (T, n_lines) input levels sampled every cycles_per_sample,
+        # returns (times, irqs) of the interrupt requests the edges raise, in time order
+        levels = np.asarray(levels, dtype=bool)
+        prev = np.vstack([levels[:1], levels[:-1]])
+        rising = levels & ~prev & self.mask_bits(self.rtsr)
+        falling = ~levels & prev & self.mask_bits(self.ftsr)
+        t, line = np.nonzero((rising | falling) & self.mask_bits(self.imr))
+        irqs = EXTI_IRQN[line]
+        keep = irqs >= 0
+        return t[keep] * cycles_per_sample, irqs[keep]
+
+
+class Simulator:
+    # single core, preemptive by group priority, with tail chaining.
+    # run() returns the event timeline (EVENT_DTYPE) the scenes replay
+    def __init__(self, nvic, isr_cycles=50):
+        self.nvic = nvic
+        self.isr_cycles = np.broadcast_to(isr_cycles, (nvic.n_irqs,))
+        self.events = []
+        self.pending_since = {}
+        self.stack = []
+        self.t = 0
+
+    def emit(self, kind, irq=-1, value=-1):
+        self.events.append((self.t, kind, irq, value))
+
+    def running_priority(self):
+        return self.nvic.priority(self.stack[-1][0]) if self.stack else np.inf
+
+    def request(self, irq, time):
+        if self.nvic.is_pending(irq):
+            # already pending, the second request is lost
+            self.emit('merged', irq)
+            return
+        self.nvic.set_pending(irq)
+        self.pending_since[irq] = time
+        self.emit('pending', irq)
+
+    def dispatch(self, after_exit):
+        irq = self.nvic.highest_pending(self.running_priority())
+        if irq is None:
+            if after_exit:
+                self.t += EXIT_CYCLES
+                self.emit('unstack', self.stack[-1][0] if self.stack else -1)
+            return
+        if after_exit:
+            self.emit('tail_chain', irq)
+            self.t += TAIL_CHAIN_CYCLES
+        else:
+            self.emit('preempt' if self.stack else 'stack', irq)
+            self.t += ENTRY_CYCLES
+        self.emit('fetch', irq, vector_address(irq, self.nvic.vtor))
+        self.nvic.activate(irq)
+        self.stack.append([irq, float(self.isr_cycles[irq])])
+        self.emit('enter', irq, int(self.t - self.pending_since.pop(irq)))
+
+    def run(self, times, irqs):
+        order = np.argsort(times, kind='stable')
+        times = np.asarray(times, dtype=float)[order]
+        irqs = np.asarray(irqs)[order]
+        i = 0
+        while i < len(times) or self.stack:
+            finish = self.t + self.stack[-1][1] if self.stack else np.inf
+            if i < len(times) and times[i] <= finish:
+                # a request can land while an entry/exit sequence is running, it is seen after it
+                now = max(times[i], self.t)
+                if self.stack:
+                    self.stack[-1][1] -= now - self.t
+                self.t = now
+                self.request(int(irqs[i]), times[i])
+                i += 1
+                self.dispatch(after_exit=False)
+            else:
+                self.t = finish
+                irq = self.stack.pop()[0]
+                self.nvic.deactivate(irq)
+                self.emit('exit', irq)
+                self.dispatch(after_exit=True)
+        return self.timeline()
+
+    def timeline(self):
+        return np.array(self.events, dtype=EVENT_DTYPE)
+
+
+def latencies(timeline):
+    enter = timeline[timeline['kind'] == 'enter']
+    return enter['irq'], enter['value']
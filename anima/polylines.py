@@ -0,0 +1,15 @@
+import numpy as np
+
+
+def curve_size(mob):
+    # points per bezier curve: cairo VMobjects are cubic, opengl ones quadratic
+    return getattr(mob, 'n_points_per_cubic_curve', None) or mob.n_points_per_curve
+
+
+def polyline_points(vertices, curve_size):
+    # (N, K, 3) polylines -> bezier points, one straight curve per segment
+    vertices = np.asarray(vertices, dtype=float)
+    alphas = np.linspace(0, 1, curve_size)[None, None, :, None]
+    starts = vertices[:, :-1, None, :]
+    ends = vertices[:, 1:, None, :]
+    return (starts + alphas * (ends - starts)).reshape(-1, 3)
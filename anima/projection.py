@@ -0,0 +1,45 @@
+import numpy as np
+
+
+def perspective_matrix(near, far, aspect=1.0, fov_y=np.pi/2):
+    # OpenGL style: camera looks down -z, points on the near plane end up at z = -near
+    top = near * np.tan(fov_y/2)
+    right = top * aspect
+    return np.array([
+        [near/right, 0, 0, 0],
+        [0, near/top, 0, 0],
+        [0, 0, -(far + near)/(far - near), -2*far*near/(far - near)],
+        [0, 0, -1, 0]
+    ])
+
+
+def to_homogeneous(points):
+    points = np.asarray(points, dtype=float).reshape(-1, 3)
+    return np.hstack([points, np.ones((len(points), 1))])
+
+
+def project_points(points, near, far, aspect=1.0, fov_y=np.pi/2):
+    """
+    points: (N, 3) camera space coordinates
+    returns (ndc, screen), both (N, 3):
+        ndc    -> normalized device coordinates, x/y/z in [-1, 1] inside the frustum
+        screen -> the same points on the near plane (z = -near), in camera space units,
+                  so they can go straight into CustomAxes3D.c2p
+    """
+    mat = perspective_matrix(near, far, aspect, fov_y)
+    clip = to_homogeneous(points) @ mat.T
+    ndc = clip[:, :3] / clip[:, 3:]
+
+    top = near * np.tan(fov_y/2)
+    right = top * aspect
+    screen = np.empty_like(ndc)
+    screen[:, 0] = ndc[:, 0] * right
+    screen[:, 1] = ndc[:, 1] * top
+    screen[:, 2] = -near
+    return ndc, screen
+
+
+def project_to_near_plane(near, points):
+    # only the near plane matters for the screen position, far/fov just scale ndc
+    _, screen = project_points(points, near, far=near + 1)
+    return screen
@@ -0,0 +1,138 @@
+import argparse
+import ast
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+ANIMA_DIR = Path(__file__).resolve().parent
+SCENE_BASES = {
+    'Scene', 'ThreeDScene', 'MovingCameraScene', 'ZoomedScene', 'InteractiveScene',
+    'StaticLayerScene', 'SegmentedScene', 'StreamingScene', 'HoldFrameScene',
+}
+
+# manim community quality letter -> manimgl flag
+MANIMGL_QUALITY = {'l': '-l', 'm': '-m', 'h': '--hd', 'k': '--uhd'}
+
+
+class SceneJob:
+    def __init__(self, module, name, manimgl=False, quality='h', extra_args=()):
+        self.module = module
+        self.name = name
+        self.manimgl = manimgl
+        self.quality = quality
+        self.extra_args = list(extra_args)
+
+    @property
+    def label(self):
+        return f'{self.module.relative_to(ANIMA_DIR)}:{self.name}'
+
+    def command(self):
+        if self.manimgl:
+            return ['manimgl', self.module.name, self.name, '-w', MANIMGL_QUALITY[self.quality], *self.extra_args]
+        return ['manim', 'render', f'-q{self.quality}', *self.extra_args, self.module.name, self.name]
+
+
+def find_scenes(module):
+    # parse instead of import: modules mix manim and manimlib, which can't share a process
+    tree = ast.parse(module.read_text())
+    manimgl = any(
+        isinstance(node, ast.ImportFrom) and node.module and node.module.split('.')[0] == 'manimlib'
+        for node in ast.walk(tree)
+    )
+    scenes = []
+    scene_bases = set(SCENE_BASES)
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        bases = {b.id for b in node.bases if isinstance(b, ast.Name)}
+        if bases & scene_bases:
+            scene_bases.add(node.name)
+            # the helper base classes are scenes too, but have nothing to render
+            if node.name not in SCENE_BASES:
+                scenes.append(node.name)
+    return scenes, manimgl
+
+
+def discover(root=ANIMA_DIR):
+    jobs = []
+    for module in sorted(root.rglob('*.py')):
+        if module.resolve() == Path(__file__).resolve() or 'media' in module.parts:
+            continue
+        scenes, manimgl = find_scenes(module)
+        jobs.extend(SceneJob(module, name, manimgl) for name in scenes)
+    return jobs
+
+
+def render(job, timeout):
+    start = time.time()
+    try:
+        result = subprocess.run(
+            job.command(), cwd=job.module.parent, stdin=subprocess.DEVNULL,
+            capture_output=True, text=True, timeout=timeout
+        )
+        ok, output = result.returncode == 0, result.stderr or result.stdout
+    except subprocess.TimeoutExpired:
+        ok, output = False, f'timed out after {timeout}s'
+    except OSError as e:
+        ok, output = False, str(e)
+    return ok, time.time() - start, output
+
+
+def run(jobs, workers, timeout):
+    # each scene is its own manim process, a failing one only fails its own job
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(render, job, timeout): job for job in jobs}
+        for done, future in enumerate(as_completed(futures), start=1):
+            job = futures[future]
+            ok, seconds, output = future.result()
+            results[job.label] = (ok, seconds, output)
+            print(f'[{done}/{len(jobs)}] {"ok  " if ok else "FAIL"} {job.label} ({seconds:.1f}s)', flush=True)
+    return results
+
+
+def report(results):
+    failed = {label: r for label, r in results.items() if not r[0]}
+    total = sum(r[1] for r in results.values())
+    print(f'\n{len(results) - len(failed)}/{len(results)} scenes rendered, {total:.1f}s of render time')
+    for label, (_, _, output) in failed.items():
+        tail = '\n    '.join(output.strip().splitlines()[-10:])
+        print(f'\n{label} failed:\n    {tail}')
+    return not failed
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='render every scene under anima/ in parallel')
+    parser.add_argument('-q', '--quality', default='h', choices=list(MANIMGL_QUALITY),
+                        help='default quality for every scene')
+    parser.add_argument('-s', '--scene-quality', action='append', default=[], metavar='SCENE=Q',
+                        help='per scene quality, e.g. -s Test4=l or -s interrupts/interrupts.py:Test=k')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(),
+                        help='number of scenes rendered at the same time')
+    parser.add_argument('--timeout', type=float, default=None, help='seconds before a scene is killed')
+    parser.add_argument('--skip', action='append', default=[], help='scene name or module:scene to leave out')
+    parser.add_argument('only', nargs='*', help='only render these scene names (or module:scene)')
+    return parser.parse_args()
+
+
+def matches(job, names):
+    return job.name in names or job.label in names
+
+
+def main():
+    args = parse_args()
+    overrides = dict(item.split('=', 1) for item in args.scene_quality)
+    jobs = [job for job in discover() if not matches(job, args.skip)]
+    if args.only:
+        jobs = [job for job in jobs if matches(job, args.only)]
+    for job in jobs:
+        job.quality = overrides.get(job.label, overrides.get(job.name, args.quality))
+    print(f'rendering {len(jobs)} scenes on {args.jobs} workers')
+    return 0 if report(run(jobs, args.jobs, args.timeout)) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
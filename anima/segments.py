@@ -0,0 +1,119 @@
+import hashlib
+import inspect
+from contextlib import contextmanager
+
+from manim import *
+from manim.scene.scene_file_writer import SceneFileWriter
+from manim.utils.file_ops import write_to_movie
+from manim.utils.hashing import get_hash_from_play_call
+
+from static_layer import DirtyRectRenderer, StaticLayerScene
+
+
+@contextmanager
+def caching_disabled():
+    # the renderer reads config.disable_caching on every play() to decide whether to hash it
+    caching = config.disable_caching
+    config.disable_caching = True
+    try:
+        yield
+    finally:
+        config.disable_caching = caching
+
+
+class SegmentWriter(SceneFileWriter):
+    # one partial movie file per segment instead of one per play(). the renderer opens a
+    # segment, every play() inside it writes into the same stream, and the stream is only
+    # closed when the segment ends
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.segment_file = None
+        self.stream_open = False
+
+    def start_segment(self, key):
+        # same check as the base add_partial_movie_file, nothing is written for
+        # --dry_run or image output and segment_file stays None
+        if not hasattr(self, 'partial_movie_directory') or not write_to_movie():
+            return
+        super().add_partial_movie_file(key)
+        self.segment_file = self.partial_movie_files[-1]
+
+    def close_segment(self):
+        if self.stream_open:
+            # 0.18 pipes frames into an ffmpeg process, 0.19 writes them with pyav
+            close = getattr(self, 'close_partial_movie_stream', None) or self.close_movie_pipe
+            close()
+        self.stream_open = False
+        self.segment_file = None
+
+    def add_partial_movie_file(self, hash_animation):
+        # per play files are replaced by the segment file added in start_segment
+        pass
+
+    def begin_animation(self, allow_write=False, file_path=None):
+        if allow_write and self.segment_file is not None and not self.stream_open:
+            super().begin_animation(allow_write, file_path=self.segment_file)
+            self.stream_open = True
+
+    def end_animation(self, allow_write=False):
+        pass
+
+    def finish(self):
+        self.close_segment()
+        super().finish()
+
+
+class SegmentRenderer(DirtyRectRenderer):
+    # consecutive play() calls are rendered into one segment. per play hashing is
+    # turned off, a segment is hashed once when it starts (scene state + module source +
+    # segment index) and skipped as a whole when that file is already cached
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('file_writer_class', SegmentWriter)
+        super().__init__(*args, **kwargs)
+        self.segment_plays = 0
+        self.segment_index = 0
+        self.segment_cached = False
+
+    def segment_key(self, scene):
+        source = inspect.getsource(inspect.getmodule(type(scene)))
+        state = get_hash_from_play_call(scene, self.camera, [], scene.mobjects)
+        key = hashlib.sha256(f'{source}{state}{self.segment_index}'.encode()).hexdigest()
+        return f'segment_{self.segment_index:04d}_{key[:16]}'
+
+    def start_segment(self, scene):
+        key = self.segment_key(scene)
+        self.segment_cached = not config.disable_caching and self.file_writer.is_already_cached(key)
+        self.file_writer.start_segment(key)
+
+    def end_segment(self):
+        if self.segment_plays:
+            self.file_writer.close_segment()
+            self.segment_index += 1
+        self.segment_plays = 0
+        self.segment_cached = False
+
+    def update_skipping_status(self):
+        super().update_skipping_status()
+        if self.segment_cached:
+            self.skip_animations = True
+
+    def play(self, scene, *args, **kwargs):
+        if not self.segment_plays:
+            self.start_segment(scene)
+        with caching_disabled():
+            super().play(scene, *args, **kwargs)
+        self.segment_plays += 1
+        if self.segment_plays >= scene.plays_per_segment:
+            self.end_segment()
+
+
+class SegmentedScene(StaticLayerScene):
+    # for scenes made of many short plays (code walkthroughs): plays_per_segment plays
+    # share one partial movie file, checkpoint() ends the current segment early, e.g. at
+    # the end of a section that is worth caching on its own
+    renderer_class = SegmentRenderer
+    plays_per_segment = 16
+
+    def checkpoint(self):
+        if isinstance(self.renderer, SegmentRenderer):
+            self.renderer.end_segment()
@@ -0,0 +1,217 @@
+import hashlib
+
+import numpy as np
+from manim import *
+from manim.renderer.cairo_renderer import CairoRenderer
+from manim.utils.family import extract_mobject_family_members
+
+
+class DirtyRectRenderer(CairoRenderer):
+    # during a play() only the pixels under the moving mobjects change. instead of
+    # copying the whole static image back and redrawing everything, the rectangle the
+    # moving mobjects cover now and covered last frame is restored from the static image
+    # and redrawn, the rest of the previous frame is left as it is.
+    # only vectorized mobjects (and the static overlay) can be clipped, anything else
+    # in the moving list falls back to a full frame
+    padding = 8  # pixels, for stroke width and antialiasing
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.last_rect = None
+        # bumped whenever the static image is rebuilt (every play()), frames and
+        # rectangles of an older generation are never reused
+        self.static_generation = 0
+        self.last_generation = None
+        self.last_state = None
+        self.last_frame = None
+
+    def save_static_frame_data(self, scene, static_mobjects):
+        # this also leaves the static image in the pixel array, the last frame is gone
+        self.static_generation += 1
+        self.last_state = self.last_frame = None
+        return super().save_static_frame_data(scene, static_mobjects)
+
+    def render(self, scene, time, moving_mobjects):
+        # during wait()s the moving list can be nothing but idle updaters, an unchanged
+        # frame is not drawn again, the last one goes to the writer once more
+        state = self.moving_state(moving_mobjects)
+        if state is not None and state == self.last_state:
+            self.add_frame(self.last_frame)
+            return
+        self.update_frame(scene, moving_mobjects)
+        self.last_state = state
+        self.last_frame = self.frame_to_write()
+        self.add_frame(self.last_frame)
+
+    def frame_to_write(self):
+        return self.get_frame()
+
+    def moving_state(self, mobjects):
+        if self.static_image is None:
+            return None
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(self.static_generation.to_bytes(8, 'little'))
+        for mob in mobjects:
+            if is_static_overlay(mob):
+                continue
+            if not isinstance(mob, VMobject):
+                return None
+            digest.update(id(mob).to_bytes(8, 'little'))
+            for arr in (mob.points, mob.fill_rgbas, mob.stroke_rgbas, mob.background_stroke_rgbas):
+                digest.update(arr.tobytes())
+            digest.update(repr((
+                mob.stroke_width, mob.background_stroke_width, mob.sheen_factor, mob.z_index
+            )).encode())
+        return digest.digest()
+
+    def update_frame(self, scene, mobjects=None, include_submobjects=True, ignore_skipping=True, **kwargs):
+        if self.skip_animations and not ignore_skipping:
+            return
+        rect = self.moving_rect(mobjects)
+        # the first frame of a play() (new static image) has no previous frame to patch
+        previous = self.last_rect if self.last_generation == self.static_generation else None
+        self.last_rect, self.last_generation = rect, self.static_generation
+        if rect is None or previous is None or kwargs:
+            return super().update_frame(scene, mobjects, include_submobjects, ignore_skipping, **kwargs)
+        self.redraw_rect(union_rect(rect, previous), mobjects, include_submobjects)
+
+    def moving_rect(self, mobjects):
+        if self.static_image is None or not mobjects:
+            return None
+        camera = self.camera
+        lo, hi = np.array([np.inf, np.inf]), np.array([-np.inf, -np.inf])
+        for mob in mobjects:
+            if is_static_overlay(mob):
+                continue
+            if not isinstance(mob, VMobject):
+                return None
+            for part in mob.family_members_with_points():
+                pixels = camera.points_to_pixel_coords(part, part.points)
+                lo = np.minimum(lo, pixels.min(axis=0))
+                hi = np.maximum(hi, pixels.max(axis=0))
+        if np.any(lo > hi):
+            return (0, 0, 0, 0)
+        height, width = camera.pixel_array.shape[:2]
+        x0, y0 = np.clip(lo - self.padding, 0, (width, height)).astype(int)
+        x1, y1 = np.clip(hi + self.padding + 1, 0, (width, height)).astype(int)
+        return (x0, y0, x1, y1)
+
+    def redraw_rect(self, rect, mobjects, include_submobjects):
+        x0, y0, x1, y1 = rect
+        if x1 <= x0 or y1 <= y0:
+            return
+        camera = self.camera
+        frame = camera.pixel_array
+        frame[y0:y1, x0:x1] = self.static_image[y0:y1, x0:x1]
+
+        ctx = camera.get_cairo_context(frame)
+        matrix = ctx.get_matrix()
+        ctx.identity_matrix()
+        ctx.rectangle(x0, y0, x1 - x0, y1 - y0)
+        ctx.set_matrix(matrix)
+        ctx.clip()
+        try:
+            camera.capture_mobjects(
+                [mob for mob in mobjects if not is_static_overlay(mob)],
+                include_submobjects=include_submobjects,
+            )
+        finally:
+            ctx.reset_clip()
+        for overlay in filter(is_static_overlay, mobjects):
+            composite_over(frame[y0:y1, x0:x1], overlay.pixel_array[y0:y1, x0:x1])
+
+
+def is_static_overlay(mob):
+    return getattr(mob, 'static_overlay', False)
+
+
+def union_rect(a, b):
+    if a[2] <= a[0] or a[3] <= a[1]:
+        return b
+    if b[2] <= b[0] or b[3] <= b[1]:
+        return a
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+
+def composite_over(dst, src):
+    # straight alpha src over dst, in place
+    alpha = src[..., 3:].astype(np.float32) / 255
+    dst[...] = (src * alpha + dst * (1 - alpha) + 0.5).astype(np.uint8)
+
+
+class StaticLayerScene(Scene):
+    # manim already draws everything below the first animated mobject once per play()
+    # (renderer.static_image), but re-rasterizes everything after it every frame.
+    # here what comes after the last animated mobject is rasterized once too, into a
+    # transparent overlay that is pasted over the moving mobjects each frame.
+    # cairo renderer and a fixed camera only, anything else falls back to plain manim
+    static_layer = True
+    dirty_rects = True
+    renderer_class = DirtyRectRenderer
+
+    def __init__(self, renderer=None, camera_class=Camera, skip_animations=False, **kwargs):
+        if renderer is None and self.dirty_rects and config.renderer == RendererType.CAIRO:
+            renderer = self.renderer_class(camera_class=camera_class, skip_animations=skip_animations)
+        super().__init__(
+            renderer=renderer, camera_class=camera_class, skip_animations=skip_animations, **kwargs
+        )
+
+    def supports_static_layer(self):
+        camera = self.renderer.camera
+        return (
+            self.static_layer
+            and hasattr(self.renderer, 'static_image')
+            and type(camera) is Camera
+        )
+
+    def get_moving_and_static_mobjects(self, animations):
+        if not self.supports_static_layer():
+            return super().get_moving_and_static_mobjects(animations)
+
+        use_z_index = self.renderer.camera.use_z_index
+        families = extract_mobject_family_members(
+            list_update(self.mobjects, self.foreground_mobjects),
+            use_z_index=use_z_index,
+            only_those_with_points=True,
+        )
+        animated = [anim.mobject for anim in animations]
+        moving = set(extract_mobject_family_members(
+            [
+                mob for mob in self.get_mobject_family_members()
+                if mob in animated
+                or mob.get_family_updaters()
+                or mob in self.foreground_mobjects
+            ],
+            use_z_index=use_z_index,
+        ))
+        indices = [i for i, mob in enumerate(families) if mob in moving]
+        if not indices:
+            return [], families
+        first, last = indices[0], indices[-1] + 1
+        # static mobjects in between moving ones stay in the moving list so layering is kept
+        static_below, moving_mobjects, static_above = families[:first], families[first:last], families[last:]
+        if static_above:
+            moving_mobjects = moving_mobjects + [self.rasterize_overlay(static_above)]
+        return moving_mobjects, static_below
+
+    def rasterize_overlay(self, mobjects):
+        camera = self.renderer.camera
+        frame = camera.pixel_array
+        overlay = np.zeros_like(frame)
+        camera.pixel_array = overlay
+        try:
+            camera.capture_mobjects(mobjects, include_submobjects=False)
+        finally:
+            camera.pixel_array = frame
+            camera.pixel_array_to_cairo_context.pop(id(overlay), None)
+
+        # cairo leaves premultiplied alpha, images are composited with straight alpha
+        alpha = overlay[..., 3:].astype(np.float32)
+        rgb = overlay[..., :3] * (255 / np.where(alpha == 0, 255, alpha))
+        overlay[..., :3] = np.clip(rgb, 0, 255).astype(np.uint8)
+
+        image = ImageMobject(overlay)
+        image.static_overlay = True
+        image.stretch_to_fit_width(camera.frame_width)
+        image.stretch_to_fit_height(camera.frame_height)
+        return image.move_to(camera.frame_center)
@@ -0,0 +1,91 @@
+import subprocess
+
+from manim import *
+from manim.scene.scene_file_writer import SceneFileWriter
+from manim.utils.file_ops import write_to_movie
+
+from segments import caching_disabled
+from static_layer import DirtyRectRenderer, StaticLayerScene
+
+
+class StreamWriter(SceneFileWriter):
+    # one ffmpeg process for the whole scene, fed raw rgba frames through its stdin.
+    # no partial movie files, no concat pass. plain mp4 output only, anything else
+    # (gif, transparent movies, sections) goes through the normal writer
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.encoder = None
+
+    @staticmethod
+    def can_stream():
+        return write_to_movie() and config.format == 'mp4' and not config.transparent and not config.save_sections
+
+    def open_encoder(self, frame):
+        height, width = frame.shape[:2]
+        self.encoder = subprocess.Popen([
+            'ffmpeg', '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'rgba', '-s', f'{width}x{height}',
+            '-r', str(config.frame_rate), '-i', '-',
+            '-an', '-vcodec', 'libx264', '-pix_fmt', 'yuv420p', '-movflags', '+faststart',
+            str(self.movie_file_path),
+        ], stdin=subprocess.PIPE)
+
+    def close_encoder(self):
+        if self.encoder is None:
+            return
+        self.encoder.stdin.close()
+        if self.encoder.wait():
+            raise RuntimeError(f'ffmpeg exited with {self.encoder.returncode} writing {self.movie_file_path}')
+        self.encoder = None
+
+    def add_partial_movie_file(self, hash_animation):
+        if not self.can_stream():
+            super().add_partial_movie_file(hash_animation)
+
+    def begin_animation(self, allow_write=False, file_path=None):
+        if not self.can_stream():
+            super().begin_animation(allow_write, file_path)
+
+    def end_animation(self, allow_write=False):
+        if not self.can_stream():
+            super().end_animation(allow_write)
+
+    def write_frame(self, frame_or_renderer, num_frames=1):
+        if not self.can_stream():
+            return super().write_frame(frame_or_renderer, num_frames)
+        if self.encoder is None:
+            self.open_encoder(frame_or_renderer)
+        # the buffer goes to the pipe as is, the write returns once the kernel has it
+        data = memoryview(frame_or_renderer).cast('B')
+        for _ in range(num_frames):
+            self.encoder.stdin.write(data)
+
+    def combine_to_movie(self):
+        if not self.can_stream():
+            return super().combine_to_movie()
+        self.close_encoder()
+
+
+class StreamRenderer(DirtyRectRenderer):
+    # frames are written synchronously by StreamWriter, so the live pixel array can be
+    # handed over instead of the copy get_frame() makes
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('file_writer_class', StreamWriter)
+        super().__init__(*args, **kwargs)
+
+    def frame_to_write(self):
+        if not StreamWriter.can_stream():
+            return super().frame_to_write()
+        return self.camera.pixel_array
+
+    def play(self, scene, *args, **kwargs):
+        # nothing is cached per play() when there are no partial movie files
+        if not StreamWriter.can_stream():
+            return super().play(scene, *args, **kwargs)
+        with caching_disabled():
+            super().play(scene, *args, **kwargs)
+
+
+class StreamingScene(StaticLayerScene):
+    # for long scenes that are always rendered start to end
+    renderer_class = StreamRenderer
@@ -0,0 +1,143 @@
+import ast
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from manim import config
+from manim.utils.tex import TexTemplate
+from manim.utils.tex_file_writing import generate_tex_file
+
+# one cache for every module under anima/, svg file names are content hashes
+# (manim names them after the hash of the full tex document)
+CACHE_DIR = Path(os.environ.get('ANIMA_CACHE_DIR', Path(__file__).resolve().parent / '.cache'))
+TEX_DIR = CACHE_DIR / 'Tex'
+TEXT_DIR = CACHE_DIR / 'texts'
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+# class -> (environment, arg_separator), as manim joins the constructor args
+TEX_CLASSES = {'MathTex': ('align*', ' '), 'Tex': ('center', '')}
+
+
+def use_shared_cache():
+    TEX_DIR.mkdir(parents=True, exist_ok=True)
+    TEXT_DIR.mkdir(parents=True, exist_ok=True)
+    config.tex_dir = str(TEX_DIR)
+    config.text_dir = str(TEXT_DIR)
+    prune()
+
+
+def prune(max_bytes=MAX_CACHE_BYTES):
+    # drop least recently used files until the cache fits in max_bytes
+    # other renders share the cache and may delete files while this runs (os.walk
+    # skips directories that vanish)
+    stats = {}
+    for root, _, names in os.walk(CACHE_DIR):
+        for name in names:
+            f = Path(root) / name
+            try:
+                stats[f] = f.stat()
+            except FileNotFoundError:
+                pass
+    total = sum(st.st_size for st in stats.values())
+    removed = 0
+    for f in sorted(stats, key=lambda f: max(stats[f].st_atime, stats[f].st_mtime)):
+        if total <= max_bytes:
+            break
+        total -= stats[f].st_size
+        try:
+            f.unlink()
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def collect_tex_strings(module_path):
+    # (expression, environment) for every MathTex/Tex built from literal strings
+    tree = ast.parse(Path(module_path).read_text())
+    found = []
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Call) or not isinstance(node.func, ast.Name):
+            continue
+        if node.func.id not in TEX_CLASSES or not node.args:
+            continue
+        env, separator = TEX_CLASSES[node.func.id]
+        if not all(isinstance(a, ast.Constant) and isinstance(a.value, str) for a in node.args):
+            continue
+        expression = separator.join(a.value for a in node.args).strip()
+        # double braces get split into submobjects by MathTex, leave those to manim
+        if expression and '{{' not in expression and (expression, env) not in found:
+            found.append((expression, env))
+    return found
+
+
+def split_document(tex_code):
+    preamble, rest = tex_code.split(r'\begin{document}', 1)
+    body = rest.rsplit(r'\end{document}', 1)[0]
+    return preamble, body
+
+
+def batch_document(tex_files):
+    # every expression becomes one tightly cropped page of a single document
+    preamble, _ = split_document(tex_files[0].read_text())
+    preamble = re.sub(r'\\documentclass(\[[^\]]*\])?\{[^}]*\}',
+                      lambda _: '\\documentclass{article}\n\\usepackage[active,tightpage]{preview}',
+                      preamble, count=1)
+    pages = [
+        '\\begin{preview}\n' + split_document(f.read_text())[1].strip() + '\n\\end{preview}'
+        for f in tex_files
+    ]
+    return preamble + '\\begin{document}\n' + '\n'.join(pages) + '\n\\end{document}\n'
+
+
+def compile_batch(tex_files, tex_template):
+    # built next to the cache and renamed into it, so a render running at the same time
+    # never sees a half written svg
+    with tempfile.TemporaryDirectory(dir=tex_files[0].parent) as tmp:
+        tmp = Path(tmp)
+        doc = tmp / 'batch.tex'
+        doc.write_text(batch_document(tex_files))
+        subprocess.run([
+            tex_template.tex_compiler, '-interaction=batchmode', '-halt-on-error',
+            f'-output-directory={tmp}', str(doc)
+        ], check=True, cwd=tmp, stdout=subprocess.DEVNULL)
+        subprocess.run([
+            'dvisvgm', str(doc.with_suffix(tex_template.output_format)),
+            '--page=1-', '-n', '-v', '0', '-o', str(tmp / 'page-%p.svg')
+        ], check=True, cwd=tmp)
+        pages = {int(re.search(r'(\d+)$', svg.stem).group(1)): svg for svg in tmp.glob('page-*.svg')}
+        for i, tex_file in enumerate(tex_files, start=1):
+            os.replace(pages[i], tex_file.with_suffix('.svg'))
+
+
+def precompile(module_path, tex_template=None):
+    # compile all missing literal tex strings of a module in one latex + one dvisvgm run,
+    # manim then finds the svgs in tex_dir and never spawns its own processes for them
+    tex_template = tex_template or config.tex_template or TexTemplate()
+    missing = []
+    for expression, env in collect_tex_strings(module_path):
+        tex_file = Path(generate_tex_file(expression, env, tex_template))
+        svg = tex_file.with_suffix('.svg')
+        if svg.exists():
+            os.utime(svg)
+        else:
+            missing.append(tex_file)
+    if missing:
+        try:
+            compile_batch(missing, tex_template)
+        except (subprocess.CalledProcessError, KeyError, OSError) as e:
+            # not fatal, manim compiles whatever is still missing one by one
+            print(f'tex batch compile failed ({e}), falling back to per string compile', file=sys.stderr)
+    return len(missing)
+
+
+if __name__ == '__main__':
+    use_shared_cache()
+    if len(sys.argv) > 1 and sys.argv[1] == 'prune':
+        print(f'removed {prune()} files from {CACHE_DIR}')
+    else:
+        for path in sys.argv[1:]:
+            print(f'{path}: compiled {precompile(path)} new tex strings')